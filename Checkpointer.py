@@ -0,0 +1,154 @@
+import json
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+CHECKPOINT_SUFFIX = '.ckpt'
+
+def loadCheckpointModel(path):
+    """Dựng lại mô hình Keras từ một checkpoint, để dùng checkpoint như một mô hình đã lưu"""
+    import tensorflow as tf
+    with np.load(path) as archive:
+        metadata = json.loads(str(archive['metadata']))
+        model = tf.keras.models.model_from_json(str(archive['model_json']))
+        model.set_weights([archive[f'weight_{index}'] for index in range(metadata['num_weights'])])
+    return model
+
+class Checkpointer:
+    """Lưu checkpoint ở luồng nền: chụp trọng số trong bộ nhớ, ghi ra file tạm rồi đổi tên nguyên tử, giữ N bản mới nhất và bản có điểm tốt nhất"""
+    def __init__(self, directory, network, keep_last=3, max_pending=2):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.network = network
+        self.keep_last = keep_last
+        self.manifest_path = os.path.join(directory, 'checkpoints.json')
+        self.manifest = self.loadManifest()
+        self.pending = queue.Queue(max_pending)
+        self.error = None
+        self.worker = threading.Thread(target=self.writeLoop, daemon=True)
+        self.worker.start()
+
+    def loadManifest(self):
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        return {'checkpoints': [], 'best': None}
+
+    def save(self, step, score=None):
+        self.raiseError()
+        state = self.network.getTrainingState()
+        state['step'] = step
+        state['score'] = score
+        self.pending.put(state)
+
+    def writeLoop(self):
+        while True:
+            state = self.pending.get()
+            try:
+                if state is None:
+                    return
+                self.writeCheckpoint(state)
+            except Exception as error:
+                self.error = error
+            finally:
+                self.pending.task_done()
+
+    def writeCheckpoint(self, state):
+        entry = {
+            'step': state['step'],
+            'path': f"step_{state['step']:09d}{CHECKPOINT_SUFFIX}",
+            'score': state['score'],
+            'epsilon': state['epsilon'],
+            'time': time.time()
+        }
+        self.writeArchive(os.path.join(self.directory, entry['path']), state)
+        best = self.manifest['best']
+        if state['score'] is not None and (best is None or state['score'] > best['score']):
+            self.writeArchive(os.path.join(self.directory, 'best' + CHECKPOINT_SUFFIX), state)
+            best = dict(entry, path='best' + CHECKPOINT_SUFFIX)
+        checkpoints = [checkpoint for checkpoint in self.manifest['checkpoints'] if checkpoint['step'] != entry['step']] + [entry]
+        manifest = {'checkpoints': checkpoints[-self.keep_last:], 'best': best}
+        self.writeAtomic(self.manifest_path, lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+        self.manifest = manifest
+        for checkpoint in checkpoints[:-self.keep_last]:
+            path = os.path.join(self.directory, checkpoint['path'])
+            if os.path.exists(path):
+                os.remove(path)
+
+    def writeArchive(self, path, state):
+        arrays = {f'weight_{index}': weight for index, weight in enumerate(state['weights'])}
+        arrays.update({f'optimizer_{index}': value for index, value in enumerate(state['optimizer'])})
+        metadata = {
+            'step': state['step'],
+            'score': state['score'],
+            'epsilon': state['epsilon'],
+            'num_weights': len(state['weights']),
+            'num_optimizer_variables': len(state['optimizer'])
+        }
+        self.writeAtomic(path, lambda f: np.savez(
+            f,
+            model_json=np.array(state['model_json']),
+            metadata=np.array(json.dumps(metadata)),
+            **arrays
+        ))
+
+    def writeAtomic(self, path, write):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def raiseError(self):
+        if self.error is not None:
+            error = self.error
+            self.error = None
+            raise RuntimeError('Writing a checkpoint failed') from error
+
+    def wait(self):
+        self.pending.join()
+        self.raiseError()
+
+    def close(self):
+        if self.worker.is_alive():
+            self.pending.put(None)
+            self.worker.join()
+        self.raiseError()
+
+    def reset(self):
+        """Bắt đầu một lượt huấn luyện mới: xóa các checkpoint và bản tốt nhất mà manifest cũ còn giữ"""
+        self.wait()
+        entries = self.manifest['checkpoints'] + ([self.manifest['best']] if self.manifest['best'] is not None else [])
+        for entry in entries:
+            path = os.path.join(self.directory, entry['path'])
+            if os.path.exists(path):
+                os.remove(path)
+        self.manifest = {'checkpoints': [], 'best': None}
+        self.writeAtomic(self.manifest_path, lambda f: f.write(json.dumps(self.manifest, indent=2).encode()))
+
+    def latest(self):
+        if not self.manifest['checkpoints']:
+            return None
+        return os.path.join(self.directory, self.manifest['checkpoints'][-1]['path'])
+
+    def best(self):
+        if self.manifest['best'] is None:
+            return None
+        return os.path.join(self.directory, self.manifest['best']['path'])
+
+    def restore(self, path=None):
+        path = path or self.latest()
+        if path is None:
+            return None
+        with np.load(path) as archive:
+            metadata = json.loads(str(archive['metadata']))
+            self.network.setTrainingState({
+                'weights': [archive[f'weight_{index}'] for index in range(metadata['num_weights'])],
+                'optimizer': [archive[f'optimizer_{index}'] for index in range(metadata['num_optimizer_variables'])],
+                'epsilon': metadata['epsilon']
+            })
+        print(f"Checkpoint restored from {path} (step {metadata['step']})")
+        return metadata
@@ -1,60 +1,265 @@
 import tensorflow as tf
 import numpy as np
+import json
 import os
+from Profiler import NULL_PROFILER
+
+ARCHITECTURES = ('dense', 'convolutional')
 
 class DQNNetwork:
-    def __init__(self, board_width, board_height, num_ships, model_file=None):
-        tf.keras.backend.clear_session()
+    def __init__(self, board_width, board_height, num_ships, model_file=None, profiler=NULL_PROFILER, architecture='dense', model=None):
+        if architecture not in ARCHITECTURES:
+            raise ValueError(f"Unknown architecture {architecture!r}, expected one of {', '.join(ARCHITECTURES)}")
+        if model is None:
+            tf.keras.backend.clear_session()
+        self.profiler = profiler
+        self.architecture = architecture
         self.board_width = board_width
         self.board_height = board_height
         self.num_ships = num_ships
         self.num_input_dimension = self.num_ships + 1
         self.board_size = self.board_width * self.board_height
+        self.input_size = self.board_size * self.num_input_dimension
         self.epsilon = 1.0 
         self.epsilon_min = 0.01  
         self.epsilon_decay = 0.995 
-        input_shape = (board_height * board_width * (self.num_input_dimension),)
-        self.model = tf.keras.Sequential([
+        self.model = None
+        self.train_step = None
+        self.target_train_step = None
+        self.predict_step = None
+        if model is not None:
+            self.setModel(model)
+        elif model_file is not None:
+            print('Attempting to load model', model_file)
+            self.restoreModel(model_file)
+        if self.model is None:
+            self.model = self.buildModel()
+            self.warmUp()
+
+    def buildModel(self):
+        if self.architecture == 'convolutional':
+            return self.buildConvolutionalModel()
+        input_shape = (self.board_height * self.board_width * (self.num_input_dimension),)
+        model = tf.keras.Sequential([
             tf.keras.layers.InputLayer(input_shape=input_shape),
-            tf.keras.layers.Reshape((board_height, board_width, self.num_input_dimension)),
+            tf.keras.layers.Reshape((self.board_height, self.board_width, self.num_input_dimension)),
             tf.keras.layers.Conv2D(32, (3, 3), padding="same", activation='relu'),
             tf.keras.layers.Conv2D(64, (3, 3), padding="same", activation='relu'),
             tf.keras.layers.Conv2D(self.num_input_dimension, (1, 1), padding="same", activation='relu'),
             tf.keras.layers.Flatten(),
             tf.keras.layers.Dense(self.board_size, activation='softmax')
         ])
-        self.model.compile(
+        model.compile(
             optimizer=tf.keras.optimizers.Adam(learning_rate=0.0005),
             loss='sparse_categorical_crossentropy'
         )
-        if model_file is not None and os.path.exists(model_file):
-            print('Attempting to load model', model_file)
-            self.restoreModel(model_file)
+        return model
+
+    def buildConvolutionalModel(self):
+        model = tf.keras.Sequential([
+            tf.keras.layers.InputLayer(input_shape=(None, None, self.num_input_dimension)),
+            tf.keras.layers.Conv2D(32, (3, 3), padding="same", activation='relu'),
+            tf.keras.layers.Conv2D(64, (3, 3), padding="same", activation='relu'),
+            tf.keras.layers.Conv2D(64, (3, 3), padding="same", activation='relu'),
+            tf.keras.layers.Conv2D(1, (1, 1), padding="same"),
+            tf.keras.layers.Reshape((-1,)),
+            tf.keras.layers.Softmax()
+        ])
+        model.compile(
+            optimizer=tf.keras.optimizers.Adam(learning_rate=0.0005),
+            loss='sparse_categorical_crossentropy'
+        )
+        return model
+
+    def setModel(self, model):
+        if len(model.input_shape) == 4:
+            if model.input_shape[-1] != self.num_input_dimension:
+                raise ValueError(f'Model expects {model.input_shape[-1]} input planes, board has {self.num_input_dimension}')
+            self.architecture = 'convolutional'
+        else:
+            if model.input_shape[-1] != self.input_size:
+                raise ValueError(f'Model expects {model.input_shape[-1]} inputs, board has {self.input_size}')
+            self.architecture = 'dense'
+        self.model = model
+        self.train_step = None
+        self.target_train_step = None
+        self.predict_step = None
+        self.warmUp()
+
+    def toModelInput(self, input_dimensions):
+        if self.architecture == 'dense':
+            return input_dimensions
+        planes = tf.reshape(input_dimensions, (-1, self.num_input_dimension, self.board_height, self.board_width))
+        return tf.transpose(planes, (0, 2, 3, 1))
 
     def decay_epsilon(self):
         if self.epsilon > self.epsilon_min:
             self.epsilon *= self.epsilon_decay
 
     def getBoardProbabilities(self, input_dimensions):
-        return self.model.predict(input_dimensions)
+        if self.predict_step is None:
+            self.predict_step = self.buildPredictStep()
+        input_dimensions = np.reshape(input_dimensions, (-1, self.input_size))
+        with self.profiler.stage('inference'):
+            board_probs = self.predict_step(tf.convert_to_tensor(input_dimensions, dtype=tf.float32)).numpy()
+        self.profiler.count('inference_calls')
+        self.profiler.count('inferences', len(input_dimensions))
+        return board_probs
+
+    def buildPredictStep(self):
+        model = self.model
+        to_model_input = self.toModelInput
+
+        @tf.function(input_signature=[tf.TensorSpec((None, self.input_size), tf.float32)])
+        def predict_step(input_dimensions):
+            return model(to_model_input(input_dimensions), training=False)
+        return predict_step
+
+    def warmUp(self):
+        self.getBoardProbabilities(np.zeros((1, self.input_size), dtype='float32'))
 
     def runTrainStep(self, input_dimensions, labels, learning_rate):
         labels = np.array(labels).flatten()
-        history = self.model.fit(
-            input_dimensions,
-            labels,
-            epochs=1,
-            verbose=0
+        input_dimensions = np.reshape(input_dimensions, (len(labels), -1))
+        advantages = np.broadcast_to(np.asarray(learning_rate, dtype='float32'), labels.shape)
+        return self.trainBatch(input_dimensions, labels, advantages)
+
+    def trainBatch(self, input_dimensions, actions, advantages):
+        if self.train_step is None:
+            self.train_step = self.buildTrainStep()
+        with self.profiler.stage('train_step'):
+            loss = float(self.train_step(
+                tf.convert_to_tensor(input_dimensions, dtype=tf.float32),
+                tf.convert_to_tensor(actions, dtype=tf.int32),
+                tf.convert_to_tensor(advantages, dtype=tf.float32)
+            ))
+        self.profiler.count('train_steps')
+        self.profiler.count('train_samples', len(actions))
+        return loss
+
+    def trainTargetBatch(self, input_dimensions, target_probs):
+        if self.target_train_step is None:
+            self.target_train_step = self.buildTargetTrainStep()
+        loss = self.target_train_step(
+            tf.convert_to_tensor(input_dimensions, dtype=tf.float32),
+            tf.convert_to_tensor(target_probs, dtype=tf.float32)
         )
-        return history.history['loss'][0]
+        return float(loss)
+
+    def getOptimizer(self):
+        if self.model.optimizer is None:
+            self.model.compile(
+                optimizer=tf.keras.optimizers.Adam(learning_rate=0.0005),
+                loss='sparse_categorical_crossentropy'
+            )
+        optimizer = self.model.optimizer
+        optimizer.build(self.model.trainable_variables)
+        return optimizer
+
+    def buildTargetTrainStep(self):
+        model = self.model
+        optimizer = self.getOptimizer()
+        input_size = self.input_size
+        to_model_input = self.toModelInput
+
+        @tf.function(input_signature=[
+            tf.TensorSpec((None, input_size), tf.float32),
+            tf.TensorSpec((None, self.board_size), tf.float32)
+        ])
+        def target_train_step(input_dimensions, target_probs):
+            with tf.GradientTape() as tape:
+                board_probs = model(to_model_input(input_dimensions), training=True)
+                loss = tf.reduce_mean(tf.keras.losses.categorical_crossentropy(target_probs, board_probs))
+            gradients = tape.gradient(loss, model.trainable_variables)
+            optimizer.apply_gradients(zip(gradients, model.trainable_variables))
+            return loss
+        return target_train_step
+
+    def buildTrainStep(self):
+        model = self.model
+        optimizer = self.getOptimizer()
+        input_size = self.input_size
+        to_model_input = self.toModelInput
+
+        @tf.function(input_signature=[
+            tf.TensorSpec((None, input_size), tf.float32),
+            tf.TensorSpec((None,), tf.int32),
+            tf.TensorSpec((None,), tf.float32)
+        ])
+        def train_step(input_dimensions, actions, advantages):
+            with tf.GradientTape() as tape:
+                board_probs = model(to_model_input(input_dimensions), training=True)
+                log_loss = tf.keras.losses.sparse_categorical_crossentropy(actions, board_probs)
+                loss = tf.reduce_mean(advantages * log_loss)
+            gradients = tape.gradient(loss, model.trainable_variables)
+            optimizer.apply_gradients(zip(gradients, model.trainable_variables))
+            return loss
+        return train_step
 
     def saveModel(self, model_path):
-        self.model.save(model_path + '.keras', save_format='keras')
+        with self.profiler.stage('checkpoint'):
+            directory = os.path.dirname(model_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.model.save(model_path + '.keras', save_format='keras')
+
+    def saveWeights(self, model_path):
+        self.model.save_weights(model_path + '.weights.h5')
+
+    def getTrainingState(self):
+        optimizer = self.getOptimizer()
+        return {
+            'model_json': self.model.to_json(),
+            'weights': self.model.get_weights(),
+            'optimizer': [variable.numpy() for variable in optimizer.variables],
+            'epsilon': self.epsilon
+        }
+
+    def setTrainingState(self, state):
+        optimizer = self.getOptimizer()
+        if len(state['optimizer']) != len(optimizer.variables):
+            raise ValueError(f"Checkpoint has {len(state['optimizer'])} optimizer variables, model expects {len(optimizer.variables)}")
+        self.model.set_weights(state['weights'])
+        for variable, value in zip(optimizer.variables, state['optimizer']):
+            variable.assign(value)
+        self.epsilon = float(state['epsilon'])
 
     def restoreModel(self, model_path):
-        keras_path = model_path + '.keras'
+        if model_path.endswith('.weights.h5'):
+            keras_path = model_path
+        elif model_path.endswith('.keras'):
+            keras_path = model_path
+        else:
+            keras_path = model_path + '.keras'
         if os.path.exists(keras_path):
-            self.model = tf.keras.models.load_model(keras_path)
+            if keras_path.endswith('.weights.h5'):
+                model = self.buildModel()
+                model.load_weights(keras_path)
+            else:
+                model = tf.keras.models.load_model(keras_path)
+            self.setModel(model)
             print(f'Model loaded from {keras_path}')
         else:
-            print(f'No model found at {keras_path}. Starting with a new model.')
\ No newline at end of file
+            print(f'No model found at {keras_path}. Starting with a new model.')
+
+    def exportNumpy(self, export_path):
+        layers = []
+        arrays = {}
+        for index, layer in enumerate(self.model.layers):
+            config = layer.get_config()
+            layers.append({'class_name': layer.__class__.__name__, 'config': {key: config[key] for key in (
+                'target_shape', 'padding', 'strides', 'dilation_rate', 'activation', 'use_bias',
+                'epsilon', 'center', 'scale', 'axis'
+            ) if key in config}})
+            for weight_index, weight in enumerate(layer.get_weights()):
+                arrays[f'layer_{index}_{weight_index}'] = weight
+        np.savez(
+            export_path,
+            layers=np.array(json.dumps(layers)),
+            input_size=np.array(self.input_size),
+            architecture=np.array(self.architecture),
+            num_input_dimension=np.array(self.num_input_dimension),
+            board_shape=np.array([self.board_height, self.board_width]),
+            **arrays
+        )
+        print(f'NumPy weights exported to {export_path}')
\ No newline at end of file
@@ -0,0 +1,320 @@
+"""Nhật ký ván đấu nén trên đĩa: ghi nối mọi ván tự chơi và ván với người, đọc lại thành các lô huấn luyện đã xáo trộn mà không nạp cả kho vào RAM.
+
+Mỗi file gồm phần đầu JSON mô tả cấu hình ván, sau đó là các khối nén zlib độc lập. Mỗi khối lưu theo cột:
+nguồn ván, số nước (varint), bố trí tàu (bit-packed), các nước đi (varint) và trúng/trượt (bit-packed).
+
+    python EpisodeLog.py models/episodes
+    python EpisodeLog.py models/episodes/learner.bin --batch-size 1024 --source human
+"""
+import argparse
+import glob
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+import numpy as np
+from GameConfig import GameConfig
+from Rewards import discountedRewards
+
+FILE_MAGIC = b'BSEPLOG1'
+CHUNK_MAGIC = b'EPCH'
+CHUNK_HEADER = struct.Struct('<4sIIIII')
+SOURCES = ('self_play', 'human', 'ai')
+
+def encodeVarints(values):
+    values = np.asarray(values, dtype='uint64').reshape(-1)
+    sizes = np.ones(len(values), dtype='int64')
+    for shift in range(7, 64, 7):
+        sizes += values >= np.uint64(1 << shift)
+    starts = np.cumsum(sizes) - sizes
+    positions = np.arange(int(sizes.sum())) - np.repeat(starts, sizes)
+    encoded = (np.repeat(values, sizes) >> (7 * positions).astype('uint64')) & np.uint64(0x7f)
+    encoded |= np.where(positions < np.repeat(sizes, sizes) - 1, np.uint64(0x80), np.uint64(0))
+    return encoded.astype('uint8')
+
+def decodeVarints(buffer, count, offset=0):
+    if count == 0:
+        return np.zeros(0, dtype='int64'), offset
+    data = buffer[offset:]
+    ends = np.flatnonzero(data < 0x80)[:count]
+    if len(ends) < count:
+        raise ValueError('Truncated varint stream')
+    data = data[:ends[-1] + 1]
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    positions = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+    values = np.add.reduceat((data & 0x7f).astype('uint64') << (7 * positions).astype('uint64'), starts)
+    return values.astype('int64'), offset + len(data)
+
+def getLayoutBits(num_ships):
+    return max(1, int(num_ships).bit_length())
+
+def packLayouts(layouts, num_ships):
+    """Mỗi ô lưu chỉ số tàu (0 là nước) bằng đúng số bit cần cho số tàu của hạm đội"""
+    bit_planes = (np.asarray(layouts, dtype='uint8')[..., None] >> np.arange(getLayoutBits(num_ships), dtype='uint8')) & 1
+    return np.packbits(bit_planes.reshape(-1))
+
+def unpackLayouts(packed, num_episodes, board_size, num_ships):
+    bits = getLayoutBits(num_ships)
+    bit_planes = np.unpackbits(packed, count=num_episodes * board_size * bits).reshape(num_episodes, board_size, bits)
+    return (bit_planes << np.arange(bits, dtype='uint8')).sum(axis=2, dtype='uint8').astype('int8')
+
+def encodeChunk(episodes, num_ships):
+    sources = np.array([source for (source, _, _, _) in episodes], dtype='uint8')
+    lengths = np.array([len(moves) for (_, _, moves, _) in episodes], dtype='int64')
+    moves = np.concatenate([moves for (_, _, moves, _) in episodes])
+    hits = np.concatenate([hits for (_, _, _, hits) in episodes])
+    layouts = np.stack([layout for (_, layout, _, _) in episodes])
+    return b''.join([
+        sources.tobytes(),
+        encodeVarints(lengths).tobytes(),
+        packLayouts(layouts, num_ships).tobytes(),
+        encodeVarints(moves).tobytes(),
+        np.packbits(hits != 0).tobytes()
+    ])
+
+def decodeChunk(payload, num_episodes, num_moves, board_size, num_ships):
+    """Giải mã một khối thành (nguồn, số nước mỗi ván, bố trí tàu, nước đi, trúng/trượt)"""
+    buffer = np.frombuffer(payload, dtype='uint8')
+    sources = buffer[:num_episodes]
+    lengths, offset = decodeVarints(buffer, num_episodes, num_episodes)
+    layout_size = -(-num_episodes * board_size * getLayoutBits(num_ships) // 8)
+    layouts = unpackLayouts(buffer[offset:offset + layout_size], num_episodes, board_size, num_ships)
+    moves, offset = decodeVarints(buffer, num_moves, offset + layout_size)
+    hits = np.unpackbits(buffer[offset:offset + -(-num_moves // 8)], count=num_moves).astype('int8')
+    if lengths.sum() != num_moves:
+        raise ValueError('Corrupt episode chunk')
+    return sources, lengths, layouts, moves, hits
+
+def encodeHeader(config):
+    header = json.dumps(dict(config.toDict(), version=1)).encode()
+    return FILE_MAGIC + struct.pack('<I', len(header)) + header
+
+def readChunkIndex(path):
+    """Đọc phần đầu và quét tiêu đề các khối; dừng ở khối ghi dở cuối file. Trả về (cấu hình, các khối, vị trí kết thúc hợp lệ)"""
+    chunks = []
+    with open(path, 'rb') as f:
+        if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            raise ValueError(f'{path} is not an episode log')
+        (header_size,) = struct.unpack('<I', f.read(4))
+        config = GameConfig.fromDict(json.loads(f.read(header_size)))
+        end = f.tell()
+        file_size = os.fstat(f.fileno()).st_size
+        while end + CHUNK_HEADER.size <= file_size:
+            (magic, num_episodes, num_moves, raw_size, compressed_size, checksum) = CHUNK_HEADER.unpack(f.read(CHUNK_HEADER.size))
+            if magic != CHUNK_MAGIC or end + CHUNK_HEADER.size + compressed_size > file_size:
+                break
+            chunks.append((path, end + CHUNK_HEADER.size, num_episodes, num_moves, compressed_size, checksum))
+            end += CHUNK_HEADER.size + compressed_size
+            f.seek(end)
+    return config, chunks, end
+
+def replayEpisodes(layouts, lengths, moves, hits, ship_lengths):
+    """Dựng lại mặt bắn (-1/0/1) và tàu còn nổi trước mỗi nước cho cả khối cùng lúc bằng tổng tích lũy theo từng ván"""
+    board_size = layouts.shape[1]
+    episode_ids = np.repeat(np.arange(len(lengths)), lengths)
+    episode_starts = (np.cumsum(lengths) - lengths)[episode_ids]
+    rows = np.arange(len(moves))
+    deltas = np.zeros((len(moves), board_size), dtype='int32')
+    deltas[rows, moves] = np.where(hits > 0, 1, -1)
+    boards = np.cumsum(deltas, axis=0) - deltas
+    boards -= boards[episode_starts]
+    ship_hits = (layouts[episode_ids, moves][:, None] == np.arange(1, len(ship_lengths) + 1)).astype('int32')
+    hits_before = np.cumsum(ship_hits, axis=0) - ship_hits
+    hits_before -= hits_before[episode_starts]
+    return boards.astype('int8'), hits_before < ship_lengths
+
+class EpisodeRecorder:
+    """Ghi nối các ván vào một file: gom chunk_episodes ván thành một khối, nén và ghi một lần. Mở lại file cũ sẽ cắt bỏ khối ghi dở rồi ghi tiếp"""
+    def __init__(self, path, config, chunk_episodes=1024, compression_level=6):
+        self.path = path
+        self.config = config
+        self.board_size = config.board_size
+        self.num_ships = config.num_ships
+        self.chunk_episodes = chunk_episodes
+        self.compression_level = compression_level
+        self.pending = []
+        self.num_episodes = 0
+        self.num_moves = 0
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            file_config, chunks, end = readChunkIndex(path)
+            if file_config != config:
+                raise ValueError(f'{path} was recorded for {file_config!r}, not {config!r}')
+            self.num_episodes = sum(chunk[2] for chunk in chunks)
+            self.num_moves = sum(chunk[3] for chunk in chunks)
+            self.file = open(path, 'r+b')
+            self.file.truncate(end)
+            self.file.seek(end)
+        else:
+            self.file = open(path, 'wb')
+            self.file.write(encodeHeader(config))
+            self.file.flush()
+
+    def recordEpisode(self, layout, moves, hits, source='self_play'):
+        """layout là chỉ số tàu của từng ô (0 là nước, i là tàu thứ i theo thứ tự hạm đội)"""
+        self.recordEpisodes([layout], [moves], [hits], source)
+
+    def recordEpisodes(self, layouts, all_moves, all_hits, source='self_play'):
+        source = SOURCES.index(source)
+        with self.lock:
+            for layout, moves, hits in zip(layouts, all_moves, all_hits):
+                layout = np.frombuffer(layout, dtype='uint8') if isinstance(layout, (bytes, bytearray)) else np.asarray(layout)
+                self.pending.append((source, layout.astype('uint8').reshape(-1), np.asarray(moves, dtype='int64'), np.asarray(hits, dtype='uint8')))
+            if len(self.pending) >= self.chunk_episodes:
+                self.writeChunk()
+
+    def writeChunk(self):
+        if not self.pending:
+            return
+        episodes = self.pending
+        self.pending = []
+        payload = encodeChunk(episodes, self.num_ships)
+        compressed = zlib.compress(payload, self.compression_level)
+        num_moves = sum(len(moves) for (_, _, moves, _) in episodes)
+        self.file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, len(episodes), num_moves, len(payload), len(compressed), zlib.crc32(compressed)))
+        self.file.write(compressed)
+        self.file.flush()
+        self.num_episodes += len(episodes)
+        self.num_moves += num_moves
+
+    def flush(self):
+        with self.lock:
+            self.writeChunk()
+
+    def close(self):
+        with self.lock:
+            if self.file.closed:
+                return
+            self.writeChunk()
+            self.file.close()
+
+class EpisodeDataset:
+    """Đọc một hoặc nhiều file nhật ký theo từng khối và trả về các lô (states, actions, rewards) đã xáo trộn trong một bộ đệm giới hạn"""
+    def __init__(self, paths, gamma=0.5):
+        if isinstance(paths, str):
+            paths = [paths]
+        files = []
+        for path in paths:
+            files.extend(sorted(glob.glob(os.path.join(path, '*.bin'))) if os.path.isdir(path) else [path])
+        if not files:
+            raise ValueError(f'No episode logs found in {paths!r}')
+        self.gamma = gamma
+        self.chunks = []
+        self.config = None
+        for path in files:
+            config, chunks, _ = readChunkIndex(path)
+            if self.config is not None and config != self.config:
+                raise ValueError(f'{path} was recorded for {config!r}, not {self.config!r}')
+            self.config = config
+            self.chunks.extend(chunks)
+        self.files = files
+        self.board_size = self.config.board_size
+        self.num_ships = self.config.num_ships
+        self.input_size = self.board_size * (self.num_ships + 1)
+        self.ship_lengths = np.array([ship['length'] for ship in self.config.ships], dtype='int32')
+        self.num_episodes = sum(chunk[2] for chunk in self.chunks)
+        self.num_moves = sum(chunk[3] for chunk in self.chunks)
+
+    def __len__(self):
+        return self.num_moves
+
+    def readChunk(self, chunk, handles):
+        (path, offset, num_episodes, num_moves, compressed_size, checksum) = chunk
+        if path not in handles:
+            handles[path] = open(path, 'rb')
+        handles[path].seek(offset)
+        compressed = handles[path].read(compressed_size)
+        if zlib.crc32(compressed) != checksum:
+            raise ValueError(f'Corrupt episode chunk at {path}:{offset}')
+        return decodeChunk(zlib.decompress(compressed), num_episodes, num_moves, self.board_size, self.num_ships)
+
+    def loadChunk(self, chunk, handles, sources=None):
+        """Giải mã một khối thành mặt bắn int8, tàu còn nổi, nước đi và phần thưởng chiết khấu của từng nước"""
+        (episode_sources, lengths, layouts, moves, hits) = self.readChunk(chunk, handles)
+        if sources is not None:
+            keep = np.isin(episode_sources, [SOURCES.index(source) for source in sources])
+            move_keep = np.repeat(keep, lengths)
+            (lengths, layouts, moves, hits) = (lengths[keep], layouts[keep], moves[move_keep], hits[move_keep])
+        (boards, afloat) = replayEpisodes(layouts, lengths, moves, hits, self.ship_lengths)
+        episode_ids = np.repeat(np.arange(len(lengths)), lengths)
+        positions = np.arange(len(moves)) - (np.cumsum(lengths) - lengths)[episode_ids]
+        hit_logs = np.zeros((len(lengths), lengths.max() if len(lengths) else 0), dtype='float64')
+        hit_logs[episode_ids, positions] = hits
+        rewards = discountedRewards(hit_logs, lengths, int(self.ship_lengths.sum()), self.board_size, self.gamma)
+        return boards, afloat, moves, rewards[episode_ids, positions].astype('float32')
+
+    def toStates(self, boards, afloat):
+        states = np.empty((len(boards), self.input_size), dtype='float32')
+        states[:, :self.board_size] = boards
+        states[:, self.board_size:] = np.repeat(afloat, self.board_size, axis=1)
+        return states
+
+    def batches(self, batch_size=256, shuffle=True, shuffle_buffer=65536, epochs=1, sources=None, seed=None):
+        """Sinh các lô (states, actions, rewards): đọc khối theo thứ tự ngẫu nhiên, gom tới shuffle_buffer nước rồi hoán vị.
+        Bộ nhớ chỉ phụ thuộc shuffle_buffer và kích thước khối, không phụ thuộc kích thước kho"""
+        rng = np.random.default_rng(seed)
+        handles = {}
+        try:
+            for _ in range(epochs):
+                order = rng.permutation(len(self.chunks)) if shuffle else np.arange(len(self.chunks))
+                pool = []
+                pool_size = 0
+                for position, chunk_index in enumerate(order):
+                    part = self.loadChunk(self.chunks[chunk_index], handles, sources)
+                    pool.append(part)
+                    pool_size += len(part[2])
+                    is_last = position == len(order) - 1
+                    if pool_size < (shuffle_buffer if shuffle else batch_size) and not is_last:
+                        continue
+                    (boards, afloat, actions, rewards) = (np.concatenate(column) for column in zip(*pool))
+                    if shuffle:
+                        permutation = rng.permutation(len(actions))
+                        (boards, afloat, actions, rewards) = (boards[permutation], afloat[permutation], actions[permutation], rewards[permutation])
+                    end = len(actions) if is_last else len(actions) // batch_size * batch_size
+                    for start in range(0, end, batch_size):
+                        yield self.toStates(boards[start:start + batch_size], afloat[start:start + batch_size]), actions[start:start + batch_size], rewards[start:start + batch_size]
+                    pool = [(boards[end:], afloat[end:], actions[end:], rewards[end:])]
+                    pool_size = len(actions) - end
+        finally:
+            for handle in handles.values():
+                handle.close()
+
+    def toTensorflowDataset(self, batch_size=256, **kwargs):
+        """Bọc batches() thành tf.data.Dataset, đọc và giải mã khối song song với bước huấn luyện nhờ prefetch"""
+        import tensorflow as tf
+        return tf.data.Dataset.from_generator(
+            lambda: self.batches(batch_size, **kwargs),
+            output_signature=(
+                tf.TensorSpec((None, self.input_size), tf.float32),
+                tf.TensorSpec((None,), tf.int64),
+                tf.TensorSpec((None,), tf.float32)
+            )
+        ).prefetch(tf.data.AUTOTUNE)
+
+def getLogName(config):
+    lengths = '-'.join(str(ship['length']) for ship in config.ships)
+    return f"{config.board_height}x{config.board_width}-{lengths}{'' if config.allow_touching else '-no-touch'}.bin"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', help='episode log files or directories of .bin logs')
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--shuffle-buffer', type=int, default=65536)
+    parser.add_argument('--source', action='append', choices=SOURCES, default=None, help='only read episodes from this source')
+    args = parser.parse_args()
+    dataset = EpisodeDataset(args.paths)
+    disk_bytes = sum(os.path.getsize(path) for path in dataset.files)
+    print(f'{dataset.config!r}: {len(dataset.files)} files, {len(dataset.chunks)} chunks')
+    print(f'{dataset.num_episodes} episodes, {dataset.num_moves} moves, {disk_bytes} bytes ({disk_bytes / max(dataset.num_moves, 1):.2f} bytes/move)')
+    start = time.perf_counter()
+    num_moves = sum(len(actions) for (_, actions, _) in dataset.batches(args.batch_size, shuffle_buffer=args.shuffle_buffer, sources=args.source))
+    elapsed = time.perf_counter() - start
+    print(f'Read {num_moves} moves in {elapsed:.2f}s ({num_moves / max(elapsed, 1e-9):.0f} moves/s)')
+
+if __name__ == '__main__':
+    main()
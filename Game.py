@@ -1,186 +1,299 @@
-import copy
 import random
+from functools import lru_cache
 import numpy as np
+from PlacementIndex import MAX_PLACEMENT_ATTEMPTS, getPlacementIndex, getHaloMask, getMaskWords, sampleFleetLayouts
+from Profiler import NULL_PROFILER
 
-class HuntingStrategy:
-    def __init__(self, board_width, board_height):
-        self.board_width = board_width
+class BatchHuntingStrategy:
+    """Chế độ săn cho nhiều bàn cùng lúc: chấm điểm ô trống bằng các vị trí đặt tàu còn nổi phủ lên phát trúng chưa chìm,
+    không đi qua ô trượt hay ô tàu đã chìm; vị trí phủ nhiều phát trúng hơn được ưu tiên theo hệ số hit_weight"""
+    def __init__(self, board_height, board_width, ship_lengths, allow_touching=True, hit_weight=16.0):
         self.board_height = board_height
-        self.reset()
-
-    def reset(self):
-        self.hits = []  
-        self.potential_direction = None 
-        self.last_hit = None
-
-    def get_hunt_targets(self, available_moves):
-        """Trả về danh sách các vị trí nên tấn công tiếp theo"""
-        if not self.hits:
-            return None 
-        moves = []
-        last_hit = self.hits[-1]
-        x, y = divmod(last_hit, self.board_width)
-        if self.potential_direction == 'horizontal':
-            if y > 0:
-                moves.append(last_hit - 1)
-            if y < self.board_width - 1:
-                moves.append(last_hit + 1)
-        elif self.potential_direction == 'vertical':
-            if x > 0:
-                moves.append(last_hit - self.board_width)
-            if x < self.board_height - 1:
-                moves.append(last_hit + self.board_width)
-        else:
-            if y > 0:
-                moves.append(last_hit - 1)
-            if y < self.board_width - 1:
-                moves.append(last_hit + 1)
-            if x > 0:
-                moves.append(last_hit - self.board_width)
-            if x < self.board_height - 1:
-                moves.append(last_hit + self.board_width)
-        valid_moves = [move for move in moves if available_moves[move] == 1]
-        return valid_moves if valid_moves else None
-
-    def update(self, move, is_hit, is_ship_sunk):
-        """Cập nhật strategy dựa trên kết quả đánh"""
-        if is_hit:
-            if is_ship_sunk:
-                self.reset()
-            else:
-                self.hits.append(move)
-                if len(self.hits) >= 2:
-                    x1, y1 = divmod(self.hits[-2], self.board_width)
-                    x2, y2 = divmod(move, self.board_width)
-                    if x1 == x2:
-                        self.potential_direction = 'horizontal'
-                    elif y1 == y2:
-                        self.potential_direction = 'vertical'
+        self.board_width = board_width
+        self.board_size = board_height * board_width
+        self.allow_touching = allow_touching
+        self.hit_weight = hit_weight
+        self.lengths = sorted(set(ship_lengths))
+        self.length_ships = np.array([[ship_length == length for ship_length in ship_lengths] for length in self.lengths], dtype='float32')
+        self.masks = [getPlacementIndex(board_height, board_width, length).masks.astype('float32') for length in self.lengths]
+        halo = np.zeros((self.board_size, self.board_size), dtype='float32')
+        neighbours = np.zeros((self.board_size, self.board_size), dtype='float32')
+        for location in range(self.board_size):
+            halo_mask = getHaloMask(1 << location, board_height, board_width)
+            halo[location] = [(halo_mask >> cell) & 1 for cell in range(self.board_size)]
+            x, y = divmod(location, board_width)
+            for (i, j) in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if 0 <= i < board_height and 0 <= j < board_width:
+                    neighbours[location, i * board_width + j] = 1
+        self.halo = halo
+        self.neighbours = neighbours
+
+    def getTargetMasks(self, state_number, sunk_cells, afloat):
+        """state_number (N, S) gồm -1/0/1, sunk_cells (N, S) là ô của tàu đã chìm, afloat (N, số tàu); trả về mặt nạ ô nên bắn, toàn False với bàn không cần săn"""
+        state_number = np.asarray(state_number)
+        sunk_cells = np.asarray(sunk_cells, dtype=bool)
+        targets = np.zeros(state_number.shape, dtype=bool)
+        unresolved = (state_number > 0) & ~sunk_cells
+        rows = np.flatnonzero(unresolved.any(axis=1))
+        if len(rows) == 0:
+            return targets
+        unresolved = unresolved[rows].astype('float32')
+        sunk = sunk_cells[rows].astype('float32')
+        if not self.allow_touching:
+            sunk = sunk @ self.halo
+        blocked = ((state_number[rows] < 0) | (sunk > 0)).astype('float32')
+        unknown = state_number[rows] == 0
+        afloat_counts = np.asarray(afloat, dtype='float32')[rows] @ self.length_ships.T
+        scores = np.zeros(unknown.shape, dtype='float32')
+        for index, masks in enumerate(self.masks):
+            valid = (blocked @ masks.T) == 0
+            covered = unresolved @ masks.T
+            weights = np.where(valid, np.power(self.hit_weight, covered) - 1.0, 0.0) * afloat_counts[:, index:index + 1]
+            scores += weights.astype('float32') @ masks
+        scores[~unknown] = 0
+        fallback = scores.max(axis=1) <= 0
+        if fallback.any():
+            scores[fallback] = (unresolved[fallback] @ self.neighbours) * unknown[fallback]
+        best = scores.max(axis=1, keepdims=True)
+        targets[rows] = (scores == best) & (best > 0)
+        return targets
+
+    def sampleTargets(self, targets):
+        keys = np.random.random(targets.shape)
+        keys[~targets] = -1.0
+        return keys.argmax(axis=1), targets.any(axis=1)
+
+@lru_cache(maxsize=64)
+def getBatchHuntingStrategy(board_height, board_width, ship_lengths, allow_touching=True):
+    return BatchHuntingStrategy(board_height, board_width, ship_lengths, allow_touching)
 
 class Board:
-    def __init__(self, board_height, board_width, ships):
+    __slots__ = (
+        'board_height', 'board_width', 'board_size', 'ships', 'allow_touching', 'remaining_ships', 'ship_masks',
+        'cell_ships', 'occupied_mask', 'blocked_mask', 'shot_mask', 'hit_mask', 'sunk_mask',
+        'available_bomb_locations', 'input_dimensions'
+    )
+
+    def __init__(self, board_height, board_width, ships, allow_touching=True):
         self.board_height = board_height
         self.board_width = board_width
-        self.state_number = [[0 for _ in range(self.board_width)] for _ in range(self.board_height)]
-        self.true_state = [['-' for _ in range(self.board_width)] for _ in range(self.board_height)]
-        self.view_state = [['-' for _ in range(self.board_width)] for _ in range(self.board_height)]
-        self.ships = copy.deepcopy(ships)
-        for ship in self.ships:
-            ship['remaining_length'] = ship['length']
-        self.remaining_ships = copy.deepcopy(ships)
-        self.available_bomb_locations = np.full(self.board_height * self.board_width, 1, 'float32')
-        self.hunting_strategy = HuntingStrategy(board_width, board_height)
+        self.board_size = board_height * board_width
+        self.ships = [dict(ship, remaining_length=ship['length']) for ship in ships]
+        self.allow_touching = allow_touching
+        self.remaining_ships = list(ships)
+        self.ship_masks = [0] * len(ships)
+        self.cell_ships = bytearray(self.board_size)
+        self.occupied_mask = 0
+        self.blocked_mask = 0
+        self.shot_mask = 0
+        self.hit_mask = 0
+        self.sunk_mask = 0
+        self.available_bomb_locations = np.full(self.board_size, 1, 'float32')
+        self.input_dimensions = np.full(self.board_size * (len(ships) + 1), 1, 'float32')
+        self.input_dimensions[:self.board_size] = 0
         self.randomPlacement()
 
+    @property
+    def state_number(self):
+        return [[self.getCellStateNumber(i * self.board_width + j) for j in range(self.board_width)] for i in range(self.board_height)]
+
+    @property
+    def true_state(self):
+        return [[self.getCellTrueState(i * self.board_width + j) for j in range(self.board_width)] for i in range(self.board_height)]
+
+    @property
+    def view_state(self):
+        return [[self.getCellViewState(i * self.board_width + j) for j in range(self.board_width)] for i in range(self.board_height)]
+
+    def getCellStateNumber(self, location):
+        bit = 1 << location
+        if not self.shot_mask & bit:
+            return 0
+        return 1 if self.hit_mask & bit else -1
+
+    def getCellTrueState(self, location):
+        ship_index = self.cell_ships[location]
+        return self.ships[ship_index - 1]['mark'] if ship_index else '-'
+
+    def getCellViewState(self, location):
+        bit = 1 << location
+        if self.sunk_mask & bit:
+            return self.getCellTrueState(location)
+        if self.hit_mask & bit:
+            return 'O'
+        if self.shot_mask & bit:
+            return 'X'
+        return '-'
+
     def getViewState(self):
         statePrinter = [' ' + ' '.join(str(i) for i in range(self.board_width))]
-        for i in range(self.board_height):
-            row = str(i) + ' ' + ' '.join(self.view_state[i])
+        for i, row_state in enumerate(self.view_state):
+            row = str(i) + ' ' + ' '.join(row_state)
             statePrinter.append(row)
         return statePrinter
 
     def randomPlacement(self):
-        while True:
-            ship, available_placements = self.getNextShipAvailablePlacements()
-            if ship is None:
-                break
-            placement = random.choice(available_placements)
-            self.placeShip(ship, placement)
+        attempts = 1
+        while self.remaining_ships:
+            ship = self.remaining_ships.pop(0)
+            placement_index = getPlacementIndex(self.board_height, self.board_width, ship['length'])
+            available_placements = placement_index.getAvailablePlacements(self.blocked_mask)
+            if len(available_placements) == 0:
+                if attempts >= MAX_PLACEMENT_ATTEMPTS:
+                    raise ValueError(f'Could not place the fleet on a {self.board_height}x{self.board_width} board after {attempts} attempts')
+                attempts += 1
+                self.clearShips()
+                continue
+            self.placeShipMask(ship, placement_index.bitmasks[random.choice(available_placements)])
+
+    def clearShips(self):
+        self.remaining_ships = [{'mark': ship['mark'], 'length': ship['length']} for ship in self.ships]
+        self.ship_masks = [0] * len(self.ships)
+        self.cell_ships = bytearray(self.board_size)
+        self.occupied_mask = 0
+        self.blocked_mask = 0
 
     def getNextShipAvailablePlacements(self):
         if not self.remaining_ships:
             return (None, None)
         cur_ship = self.remaining_ships.pop(0)
-        ship_length = cur_ship['length']
-        available_placement = []
-        for i in range(self.board_height):
-            for j in range(self.board_width):
-                if j + ship_length <= self.board_width and all(self.true_state[i][j + k] == '-' for k in range(ship_length)):
-                    available_placement.append({'x': i, 'y': j, 'z': 0})
-                if i + ship_length <= self.board_height and all(self.true_state[i + k][j] == '-' for k in range(ship_length)):
-                    available_placement.append({'x': i, 'y': j, 'z': 1})
+        placement_index = getPlacementIndex(self.board_height, self.board_width, cur_ship['length'])
+        available_placement = [placement_index.getPlacement(index) for index in placement_index.getAvailablePlacements(self.blocked_mask)]
         return (cur_ship, available_placement)
 
     def placeShip(self, ship, placement):
         x, y, z = placement['x'], placement['y'], placement['z']
-        ship_mark = ship['mark']
-        ship_length = ship['length']
-        for i in range(ship_length):
-            if z == 0:
-                self.true_state[x][y + i] = ship_mark
-            else:
-                self.true_state[x + i][y] = ship_mark
+        mask = 0
+        for i in range(ship['length']):
+            mask |= 1 << ((x * self.board_width + y + i) if z == 0 else ((x + i) * self.board_width + y))
+        self.placeShipMask(ship, mask)
+
+    def placeShipMask(self, ship, mask):
+        ship_index = next(index for index, board_ship in enumerate(self.ships) if board_ship['mark'] == ship['mark'])
+        self.ship_masks[ship_index] |= mask
+        self.occupied_mask |= mask
+        self.blocked_mask |= mask if self.allow_touching else getHaloMask(mask, self.board_height, self.board_width)
+        location = 0
+        while mask:
+            if mask & 1:
+                self.cell_ships[location] = ship_index + 1
+            mask >>= 1
+            location += 1
 
     def checkIfGameFinished(self):
-        return all(ship['remaining_length'] == 0 for ship in self.ships)
+        return self.hit_mask == self.occupied_mask
 
     def getNextAvailableBombLocations(self):
-        return copy.deepcopy(self.available_bomb_locations)
+        available_moves = self.available_bomb_locations.view()
+        available_moves.flags.writeable = False
+        return available_moves
 
     def placeBombAndCheckIfHit(self, location):
         location = int(location)
+        bit = 1 << location
         self.available_bomb_locations[location] = 0
-        x, y = divmod(location, self.board_width)
+        self.shot_mask |= bit
         is_hit = 0
         is_ship_sunk = False
-        if self.true_state[x][y] != '-':
-            self.state_number[x][y] = 1
-            ship_mark = self.true_state[x][y]
-            for ship in self.ships:
-                if ship['mark'] == ship_mark:
-                    ship['remaining_length'] -= 1
-                    is_hit = 1
-                    if ship['remaining_length'] == 0:
-                        is_ship_sunk = True
-                        for i in range(self.board_height):
-                            for j in range(self.board_width):
-                                if self.true_state[i][j] == ship_mark:
-                                    self.view_state[i][j] = ship_mark
-            else:
-                self.view_state[x][y] = 'O'
+        ship_index = self.cell_ships[location]
+        if ship_index:
+            is_hit = 1
+            self.input_dimensions[location] = 1
+            ship = self.ships[ship_index - 1]
+            if not self.hit_mask & bit:
+                self.hit_mask |= bit
+                ship['remaining_length'] -= 1
+                if ship['remaining_length'] == 0:
+                    is_ship_sunk = True
+                    self.sunk_mask |= self.ship_masks[ship_index - 1]
+                    self.input_dimensions[self.board_size * ship_index:self.board_size * (ship_index + 1)] = 0
         else:
-            self.state_number[x][y] = -1
-            self.view_state[x][y] = 'X'
-        self.hunting_strategy.update(location, is_hit, is_ship_sunk)
+            self.input_dimensions[location] = -1
         return is_hit
 
-    def getInputDimensions(self):
-        input_dimensions = np.array([self.state_number], dtype='float32').flatten()
-        for ship in self.ships:
-            sink_flag = 0 if ship['remaining_length'] == 0 else 1
-            ship_dimension = np.full((self.board_height, self.board_width), sink_flag, dtype='float32').flatten()
-            input_dimensions = np.append(input_dimensions, ship_dimension)
-        return input_dimensions.reshape(1, -1)
+    def getInputDimensions(self, out=None):
+        if out is None:
+            return self.input_dimensions.reshape(1, -1).copy()
+        out[...] = self.input_dimensions.reshape(out.shape)
+        return out
+
+    def hasUnresolvedHits(self):
+        return self.hit_mask & ~self.sunk_mask != 0
+
+    def getSunkCells(self):
+        return np.unpackbits(getMaskWords(self.sunk_mask, self.board_size).view('uint8'), bitorder='little')[:self.board_size].astype(bool)
 
 class Game:
-    def __init__(self, board_height, board_width, ships, network=None):
+    def __init__(self, board_height, board_width, ships, network=None, profiler=NULL_PROFILER, allow_touching=True, opening_book=None):
         self.network = network
+        self.opening_book = opening_book
+        self.profiler = profiler
         self.board_height = board_height
         self.board_width = board_width
         self.ships = ships
-        self.board = Board(self.board_height, self.board_width, self.ships)
+        self.allow_touching = allow_touching
+        self.hunting_strategy = getBatchHuntingStrategy(board_height, board_width, tuple(ship['length'] for ship in ships), allow_touching)
+        self.board = Board(self.board_height, self.board_width, self.ships, self.allow_touching)
+        self.recorder = None
+        self.recorder_source = 'self_play'
+        self.episode_moves = []
+        self.episode_hits = []
 
     def resetBoard(self):
-        self.board = Board(self.board_height, self.board_width, self.ships)
+        self.recordEpisode()
+        self.board = Board(self.board_height, self.board_width, self.ships, self.allow_touching)
+
+    def recordEpisode(self):
+        """Ghi ván hiện tại (kể cả ván dở) vào recorder nếu có, rồi bắt đầu lượt ghi mới"""
+        if self.recorder is not None and self.episode_moves:
+            self.recorder.recordEpisode(self.board.cell_ships, self.episode_moves, self.episode_hits, self.recorder_source)
+        self.episode_moves = []
+        self.episode_hits = []
 
     def takeAMove(self, next_move=None):
         if self.board.checkIfGameFinished():
             return None, None, None
-        input_dimensions = self.board.getInputDimensions()
-        available_moves = self.board.getNextAvailableBombLocations()
+        with self.profiler.stage('encode'):
+            input_dimensions = self.board.getInputDimensions()
+            available_moves = self.board.getNextAvailableBombLocations()
         if next_move is None:
-            hunt_moves = self.board.hunting_strategy.get_hunt_targets(available_moves)
-            if hunt_moves:
-                next_move = random.choice(hunt_moves)
-            else:
-                next_move = self.getBestMoveBasedOnModel(input_dimensions, available_moves)
-        is_hit = self.board.placeBombAndCheckIfHit(next_move)
+            with self.profiler.stage('policy'):
+                hunt_moves = self.getHuntMoves(input_dimensions)
+                if len(hunt_moves):
+                    next_move = random.choice(hunt_moves)
+                else:
+                    next_move = self.getBestMoveBasedOnModel(input_dimensions, available_moves)
+        with self.profiler.stage('simulate'):
+            is_hit = self.board.placeBombAndCheckIfHit(next_move)
+        self.episode_moves.append(int(next_move))
+        self.episode_hits.append(is_hit)
+        if self.recorder is not None and self.board.checkIfGameFinished():
+            self.recordEpisode()
+        self.profiler.count('moves')
         return input_dimensions, next_move, is_hit
 
+    def getHuntMoves(self, input_dimensions=None):
+        if not self.board.hasUnresolvedHits():
+            return []
+        if input_dimensions is None:
+            input_dimensions = self.board.getInputDimensions()
+        board_size = self.board.board_size
+        targets = self.hunting_strategy.getTargetMasks(
+            input_dimensions[:, :board_size],
+            self.board.getSunkCells()[None],
+            input_dimensions[:, board_size::board_size][:, :len(self.ships)] > 0
+        )
+        return np.flatnonzero(targets[0]).tolist()
+
     def getBestMoveBasedOnModel(self, input_dimensions, available_moves):
         if self.network and random.random() > self.network.epsilon:
-            board_probs = self.network.getBoardProbabilities(input_dimensions)
-            board_probs = np.multiply(board_probs, available_moves)
+            if self.opening_book is not None:
+                next_move = self.opening_book.getMove(input_dimensions)
+                if next_move is not None and available_moves[next_move] == 1:
+                    self.profiler.count('book_moves')
+                    return next_move
+            board_probs = np.reshape(self.network.getBoardProbabilities(input_dimensions), -1)
+            board_probs = np.where(available_moves == 1, board_probs, -1.0)
             return np.argmax(board_probs)
         else:
             return self.getRandomMove(available_moves)
@@ -190,4 +303,142 @@ class Game:
         num_available_moves = np.sum(available_moves)
         available_moves_p[available_moves_p != 1] = 0
         available_moves_p[available_moves_p == 1] = 1.0 / num_available_moves
-        return np.random.choice(np.arange(len(available_moves)), p=available_moves_p)
\ No newline at end of file
+        return np.random.choice(np.arange(len(available_moves)), p=available_moves_p)
+
+class BatchGame:
+    """Chạy song song nhiều ván trên mảng NumPy, tự reset khi một ván kết thúc"""
+    def __init__(self, num_games, board_height, board_width, ships, network=None, auto_reset=True, profiler=NULL_PROFILER, allow_touching=True):
+        self.num_games = num_games
+        self.allow_touching = allow_touching
+        self.profiler = profiler
+        self.board_height = board_height
+        self.board_width = board_width
+        self.board_size = board_height * board_width
+        self.ships = ships
+        self.num_ships = len(ships)
+        self.ship_lengths = np.array([ship['length'] for ship in ships], dtype='int16')
+        self.network = network
+        self.auto_reset = auto_reset
+        self.ship_cells = np.zeros((num_games, self.board_size), dtype='int8')
+        self.state_number = np.zeros((num_games, self.board_size), dtype='int8')
+        self.available_bomb_locations = np.ones((num_games, self.board_size), dtype='float32')
+        self.ship_health = np.zeros((num_games, self.num_ships), dtype='int16')
+        self.input_dimensions = np.zeros((num_games, self.board_size * (self.num_ships + 1)), dtype='float32')
+        self.sunk_cells = np.zeros((num_games, self.board_size), dtype=bool)
+        self.move_history = np.zeros((num_games, self.board_size), dtype='int16')
+        self.hit_history = np.zeros((num_games, self.board_size), dtype='int8')
+        self.move_counts = np.zeros(num_games, dtype='int64')
+        self.recorder = None
+        self.recorder_source = 'self_play'
+        self.hunting_strategy = getBatchHuntingStrategy(board_height, board_width, tuple(int(length) for length in self.ship_lengths), allow_touching)
+        self.resetBoards()
+
+    def resetBoards(self, indices=None):
+        if indices is None:
+            indices = np.arange(self.num_games)
+        indices = np.asarray(indices, dtype='int64')
+        self.state_number[indices] = 0
+        self.available_bomb_locations[indices] = 1
+        self.ship_health[indices] = self.ship_lengths
+        self.input_dimensions[indices, :self.board_size] = 0
+        self.input_dimensions[indices, self.board_size:] = 1
+        self.sunk_cells[indices] = False
+        self.move_counts[indices] = 0
+        self.randomPlacement(indices)
+
+    def randomPlacement(self, indices):
+        self.ship_cells[indices] = sampleFleetLayouts(self.board_height, self.board_width, self.ships, len(indices), self.allow_touching)
+
+    def checkIfGameFinished(self):
+        return np.all(self.ship_health == 0, axis=1)
+
+    def getNextAvailableBombLocations(self):
+        return self.available_bomb_locations.copy()
+
+    def getInputDimensions(self, out=None):
+        if out is None:
+            return self.input_dimensions.copy()
+        out[...] = self.input_dimensions
+        return out
+
+    def takeMoves(self, next_moves=None, out=None):
+        with self.profiler.stage('encode'):
+            input_dimensions = self.getInputDimensions(out)
+            available_moves = self.getNextAvailableBombLocations()
+        if next_moves is None:
+            with self.profiler.stage('policy'):
+                next_moves = self.getNextMoves(input_dimensions, available_moves)
+        with self.profiler.stage('simulate'):
+            return self.applyMoves(input_dimensions, next_moves)
+
+    def applyMoves(self, input_dimensions, next_moves):
+        next_moves = np.asarray(next_moves, dtype='int64')
+        rows = np.arange(self.num_games)
+        is_active = ~self.checkIfGameFinished()
+        active_rows = rows[is_active]
+        active_moves = next_moves[is_active]
+        hit_ship = np.where(is_active, self.ship_cells[rows, next_moves], 0).astype('int64')
+        is_hit = hit_ship > 0
+        is_new_hit = is_hit & (self.state_number[rows, next_moves] != 1)
+        self.available_bomb_locations[active_rows, active_moves] = 0
+        self.state_number[active_rows, active_moves] = np.where(is_hit[is_active], 1, -1)
+        history_index = np.minimum(self.move_counts[is_active], self.board_size - 1)
+        self.move_history[active_rows, history_index] = active_moves
+        self.hit_history[active_rows, history_index] = is_hit[is_active]
+        self.move_counts[is_active] += 1
+        self.input_dimensions[active_rows, active_moves] = np.where(is_hit[is_active], 1, -1)
+        hit_rows = rows[is_new_hit]
+        hit_ship_index = hit_ship[is_new_hit] - 1
+        self.ship_health[hit_rows, hit_ship_index] -= 1
+        is_ship_sunk = np.zeros(self.num_games, dtype=bool)
+        is_ship_sunk[hit_rows] = self.ship_health[hit_rows, hit_ship_index] == 0
+        sunk_rows = rows[is_ship_sunk]
+        if len(sunk_rows):
+            sunk_planes = self.board_size * hit_ship[is_ship_sunk]
+            self.input_dimensions[sunk_rows[:, None], sunk_planes[:, None] + np.arange(self.board_size)] = 0
+            self.sunk_cells[sunk_rows] |= self.ship_cells[sunk_rows] == hit_ship[is_ship_sunk][:, None]
+        finished = self.checkIfGameFinished()
+        if self.recorder is not None and (finished & is_ship_sunk).any():
+            self.recordEpisodes(np.flatnonzero(finished & is_ship_sunk))
+        if self.auto_reset and finished.any():
+            self.resetBoards(np.flatnonzero(finished))
+        self.profiler.count('moves', self.num_games)
+        return input_dimensions, next_moves, is_hit.astype('int8'), finished
+
+    def recordEpisodes(self, indices):
+        lengths = np.minimum(self.move_counts[indices], self.board_size)
+        self.recorder.recordEpisodes(
+            self.ship_cells[indices],
+            [self.move_history[index, :length] for index, length in zip(indices, lengths)],
+            [self.hit_history[index, :length] for index, length in zip(indices, lengths)],
+            self.recorder_source
+        )
+
+    def getNextMoves(self, input_dimensions, available_moves):
+        targets = self.hunting_strategy.getTargetMasks(self.state_number, self.sunk_cells, self.ship_health > 0)
+        hunt_moves, is_hunting = self.hunting_strategy.sampleTargets(targets)
+        next_moves = np.where(is_hunting, hunt_moves, -1)
+        pending = np.flatnonzero(~is_hunting)
+        if len(pending) == 0:
+            return next_moves
+        if self.network is not None:
+            use_model = np.random.random(len(pending)) > self.network.epsilon
+        else:
+            use_model = np.zeros(len(pending), dtype=bool)
+        model_rows = pending[use_model]
+        if len(model_rows):
+            next_moves[model_rows] = self.getBestMovesBasedOnModel(input_dimensions[model_rows], available_moves[model_rows])
+        random_rows = pending[~use_model]
+        if len(random_rows):
+            next_moves[random_rows] = self.getRandomMoves(available_moves[random_rows])
+        return next_moves
+
+    def getBestMovesBasedOnModel(self, input_dimensions, available_moves):
+        board_probs = np.asarray(self.network.getBoardProbabilities(input_dimensions))
+        board_probs = np.where(available_moves == 1, board_probs, -1.0)
+        return np.argmax(board_probs, axis=1)
+
+    def getRandomMoves(self, available_moves):
+        keys = np.random.random(available_moves.shape)
+        keys[available_moves != 1] = -1.0
+        return np.argmax(keys, axis=1)
\ No newline at end of file
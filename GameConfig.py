@@ -1,5 +1,106 @@
+from PlacementIndex import findFleetLayout
+
+MAX_BOARD_SIDE = 20
+MAX_SHIPS = 32
+
 BOARD_HEIGHT = 5
 BOARD_WIDTH = 5
 SHIP_A = {'mark': '@', 'length': 2}
 SHIP_B = {'mark': '#', 'length': 2}
-SHIPS = [SHIP_A, SHIP_B]
\ No newline at end of file
+SHIPS = [SHIP_A, SHIP_B]
+
+CLASSIC_SHIPS = [
+    {'mark': 'A', 'length': 5},
+    {'mark': 'B', 'length': 4},
+    {'mark': 'C', 'length': 3},
+    {'mark': 'D', 'length': 3},
+    {'mark': 'E', 'length': 2}
+]
+
+FLEETS = {
+    'default': SHIPS,
+    'classic': CLASSIC_SHIPS
+}
+
+class GameConfig:
+    """Cấu hình một ván: kích thước bàn cờ, đội tàu và luật có cho các tàu chạm nhau hay không"""
+    def __init__(self, board_height=BOARD_HEIGHT, board_width=BOARD_WIDTH, ships=SHIPS, allow_touching=True):
+        if isinstance(ships, str):
+            if ships not in FLEETS:
+                raise ValueError(f"Unknown fleet {ships!r}, expected one of {', '.join(FLEETS)}")
+            ships = FLEETS[ships]
+        for size in (board_height, board_width):
+            if not isinstance(size, int) or isinstance(size, bool) or not 1 <= size <= MAX_BOARD_SIDE:
+                raise ValueError(f'Board sides must be integers from 1 to {MAX_BOARD_SIDE}, got {board_height!r}x{board_width!r}')
+        if not isinstance(ships, (list, tuple)) or not 1 <= len(ships) <= MAX_SHIPS:
+            raise ValueError(f'A fleet must be a list of 1 to {MAX_SHIPS} ships')
+        for ship in ships:
+            if not isinstance(ship, dict) or not isinstance(ship.get('mark'), str) or not isinstance(ship.get('length'), int) or isinstance(ship.get('length'), bool):
+                raise ValueError(f"Each ship needs a string 'mark' and an integer 'length', got {ship!r}")
+            if not 1 <= ship['length'] <= max(board_height, board_width):
+                raise ValueError(f"A ship of length {ship['length']} does not fit on a {board_height}x{board_width} board")
+        if len(set(ship['mark'] for ship in ships)) != len(ships):
+            raise ValueError('Ship marks must be unique')
+        if findFleetLayout(board_height, board_width, tuple(ship['length'] for ship in ships), bool(allow_touching)) is None:
+            raise ValueError(f'The fleet cannot be placed on a {board_height}x{board_width} board' + ('' if allow_touching else ' without ships touching'))
+        self.board_height = board_height
+        self.board_width = board_width
+        self.ships = [{'mark': ship['mark'], 'length': ship['length']} for ship in ships]
+        self.allow_touching = bool(allow_touching)
+
+    @property
+    def board_size(self):
+        return self.board_height * self.board_width
+
+    @property
+    def num_ships(self):
+        return len(self.ships)
+
+    @property
+    def key(self):
+        return (self.board_height, self.board_width, tuple((ship['mark'], ship['length']) for ship in self.ships), self.allow_touching)
+
+    def __eq__(self, other):
+        return isinstance(other, GameConfig) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        lengths = ','.join(str(ship['length']) for ship in self.ships)
+        return f'GameConfig({self.board_height}x{self.board_width}, ships=[{lengths}], allow_touching={self.allow_touching})'
+
+    def toDict(self):
+        return {
+            'board_height': self.board_height,
+            'board_width': self.board_width,
+            'ships': self.ships,
+            'allow_touching': self.allow_touching
+        }
+
+    @classmethod
+    def fromDict(cls, data):
+        if not isinstance(data, dict):
+            raise ValueError('A configuration must be a preset name or an object')
+        return cls(data['board_height'], data['board_width'], data['ships'], data.get('allow_touching', True))
+
+    def createGame(self, network=None, **kwargs):
+        from Game import Game
+        return Game(self.board_height, self.board_width, self.ships, network=network, allow_touching=self.allow_touching, **kwargs)
+
+    def createBatchGame(self, num_games, network=None, **kwargs):
+        from Game import BatchGame
+        return BatchGame(num_games, self.board_height, self.board_width, self.ships, network=network, allow_touching=self.allow_touching, **kwargs)
+
+PRESETS = {
+    '5x5': GameConfig(),
+    '10x10': GameConfig(10, 10, CLASSIC_SHIPS),
+    '10x10-no-touch': GameConfig(10, 10, CLASSIC_SHIPS, allow_touching=False)
+}
+
+def getConfig(name):
+    if isinstance(name, GameConfig):
+        return name
+    if name not in PRESETS:
+        raise ValueError(f"Unknown configuration {name!r}, expected one of {', '.join(PRESETS)}")
+    return PRESETS[name]
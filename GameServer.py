@@ -0,0 +1,360 @@
+"""Máy chủ trò chơi không giao diện: nhiều phiên chơi cùng lúc, nước đi của AI được gom thành lô để suy luận một lần.
+
+Mỗi dòng gửi lên là một lệnh JSON, mỗi dòng trả về là một kết quả JSON:
+    {"op": "new", "config": "5x5"}                 -> {"session": 1, "board_height": 5, ...}
+    {"op": "shoot", "session": 1, "location": 12}  -> người chơi bắn vào hạm đội của AI
+    {"op": "ai_move", "session": 1}                -> AI bắn vào hạm đội của người chơi
+    {"op": "state", "session": 1}
+    {"op": "close", "session": 1}
+    {"op": "stats"}
+
+    python GameServer.py --port 8765 --model 5x5=mymodel.keras --shared 5=models/conv.keras
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from GameConfig import PRESETS, GameConfig, getConfig
+from ModelRegistry import ModelRegistry
+from ProbabilityDensity import ProbabilityDensity
+from Symmetry import CachedNetwork
+from EpisodeLog import EpisodeRecorder, getLogName
+
+class MoveBatcher:
+    """Gom các yêu cầu suy luận của nhiều phiên, chạy một lượt cho cả lô khi lô đầy hoặc hết thời gian chờ tối đa"""
+    def __init__(self, network, executor, max_batch_size=64, max_latency=0.005):
+        self.network = network
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.pending = []
+        self.has_pending = asyncio.Event()
+        self.is_full = asyncio.Event()
+        self.task = None
+        self.num_batches = 0
+        self.num_requests = 0
+
+    async def getBoardProbabilities(self, input_dimensions):
+        if isinstance(self.network, CachedNetwork):
+            board_probs = self.network.getCachedProbabilities(input_dimensions)
+            if board_probs is not None:
+                return board_probs
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self.run())
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((input_dimensions, future))
+        self.has_pending.set()
+        if len(self.pending) >= self.max_batch_size:
+            self.is_full.set()
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.has_pending.wait()
+            if len(self.pending) < self.max_batch_size:
+                try:
+                    await asyncio.wait_for(self.is_full.wait(), self.max_latency)
+                except asyncio.TimeoutError:
+                    pass
+            batch = self.pending[:self.max_batch_size]
+            self.pending = self.pending[self.max_batch_size:]
+            if not self.pending:
+                self.has_pending.clear()
+            if len(self.pending) < self.max_batch_size:
+                self.is_full.clear()
+            input_dimensions = np.concatenate([np.reshape(inputs, (1, -1)) for (inputs, _) in batch])
+            try:
+                board_probs = await loop.run_in_executor(self.executor, self.network.getBoardProbabilities, input_dimensions)
+            except Exception as error:
+                for (_, future) in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            self.num_batches += 1
+            self.num_requests += len(batch)
+            for index, (_, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result(board_probs[index])
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+class GameSession:
+    def __init__(self, session_id, config, batcher, recorder=None):
+        self.session_id = session_id
+        self.config = config
+        self.batcher = batcher
+        self.ai_game = config.createGame()
+        self.human_game = config.createGame()
+        self.ai_game.recorder = recorder
+        self.ai_game.recorder_source = 'ai'
+        self.human_game.recorder = recorder
+        self.human_game.recorder_source = 'human'
+        self.lock = asyncio.Lock()
+
+    def close(self):
+        self.ai_game.recordEpisode()
+        self.human_game.recordEpisode()
+
+class GameServer:
+    """Máy chủ asyncio giữ các phiên chơi, mỗi cấu hình ván dùng một MoveBatcher riêng"""
+    def __init__(self, registry=None, max_batch_size=64, max_latency=0.005, max_sessions=10000, cache_size=100000, record_dir=None, allow_custom_configs=False, max_configs=16):
+        self.registry = registry or ModelRegistry()
+        self.allow_custom_configs = allow_custom_configs
+        self.max_configs = max_configs
+        self.record_dir = record_dir
+        self.recorders = {}
+        self.cache_size = cache_size
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.max_sessions = max_sessions
+        self.sessions = {}
+        self.batchers = {}
+        self.session_ids = itertools.count(1)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.server = None
+        self.handlers = {
+            'new': self.newSession,
+            'shoot': self.shoot,
+            'ai_move': self.aiMove,
+            'state': self.getState,
+            'close': self.closeSession,
+            'stats': self.getStats
+        }
+
+    async def start(self, host='127.0.0.1', port=8765):
+        self.server = await asyncio.start_server(self.handleConnection, host, port)
+        return self.server
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for batcher in self.batchers.values():
+            batcher.stop()
+        for session in self.sessions.values():
+            session.close()
+        for recorder in self.recorders.values():
+            recorder.close()
+        self.executor.shutdown(wait=False)
+
+    def loadNetwork(self, config):
+        if config in self.registry:
+            network = self.registry.getNetwork(config)
+        else:
+            network = ProbabilityDensity(config.board_width, config.board_height, config.ships, allow_touching=config.allow_touching)
+        if self.cache_size > 0:
+            network = CachedNetwork(network, config.board_height, config.board_width, self.cache_size)
+        return network
+
+    async def getBatcher(self, config):
+        if config.key not in self.batchers:
+            network = await asyncio.get_running_loop().run_in_executor(self.executor, self.loadNetwork, config)
+            if config.key not in self.batchers:
+                self.batchers[config.key] = MoveBatcher(network, self.executor, self.max_batch_size, self.max_latency)
+        return self.batchers[config.key]
+
+    def getRecorder(self, config):
+        if self.record_dir is None:
+            return None
+        if config.key not in self.recorders:
+            self.recorders[config.key] = EpisodeRecorder(os.path.join(self.record_dir, getLogName(config)), config)
+        return self.recorders[config.key]
+
+    async def handleConnection(self, reader, writer):
+        owned_sessions = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self.handleLine(line, owned_sessions)
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for session_id in owned_sessions:
+                session = self.sessions.pop(session_id, None)
+                if session is not None:
+                    session.close()
+            writer.close()
+
+    async def handleLine(self, line, owned_sessions=None):
+        request = {}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                request = {}
+                raise ValueError('Expected a JSON object')
+            if request.get('op') not in self.handlers:
+                raise ValueError(f"Unknown op {request.get('op')!r}")
+            response = await self.handlers[request['op']](request)
+        except KeyError as error:
+            response = {'error': f'Missing field {error.args[0]!r}'}
+        except (ValueError, TypeError) as error:
+            response = {'error': str(error)}
+        except Exception as error:
+            response = {'error': f'{type(error).__name__}: {error}'}
+        if owned_sessions is not None and 'session' in response:
+            if request.get('op') == 'new':
+                owned_sessions.add(response['session'])
+            elif request.get('op') == 'close':
+                owned_sessions.discard(response['session'])
+        if 'id' in request:
+            response['id'] = request['id']
+        return response
+
+    def getSession(self, request):
+        session_id = request.get('session')
+        if session_id not in self.sessions:
+            raise ValueError(f'Unknown session {session_id!r}')
+        return self.sessions[session_id]
+
+    async def newSession(self, request):
+        if len(self.sessions) >= self.max_sessions:
+            raise ValueError('Too many sessions')
+        config = self.parseConfig(request.get('config', '5x5'))
+        session = GameSession(next(self.session_ids), config, await self.getBatcher(config), self.getRecorder(config))
+        self.sessions[session.session_id] = session
+        return dict(config.toDict(), session=session.session_id)
+
+    def parseConfig(self, config):
+        """Mặc định chỉ nhận cấu hình có sẵn; cấu hình tự do phải bật allow_custom_configs và bị giới hạn số lượng"""
+        if not isinstance(config, dict):
+            if not isinstance(config, str):
+                raise ValueError('A configuration must be a preset name or an object')
+            return getConfig(config)
+        config = GameConfig.fromDict(config)
+        if config.key in self.batchers or config in PRESETS.values():
+            return config
+        if not self.allow_custom_configs:
+            raise ValueError(f"Only preset configurations are accepted: {', '.join(PRESETS)}")
+        if len(self.batchers) >= self.max_configs:
+            raise ValueError('Too many distinct configurations')
+        return config
+
+    async def shoot(self, request):
+        session = self.getSession(request)
+        async with session.lock:
+            board = session.human_game.board
+            location = request['location']
+            if not isinstance(location, int) or isinstance(location, bool):
+                raise ValueError(f'Location must be an integer, got {location!r}')
+            if not 0 <= location < board.board_size:
+                raise ValueError(f'Location {location} is off the board')
+            if board.available_bomb_locations[location] != 1:
+                raise ValueError(f'Location {location} was already shot')
+            if board.checkIfGameFinished():
+                raise ValueError('Game is already finished')
+            return dict(self.applyShot(session.human_game, location), session=session.session_id)
+
+    async def aiMove(self, request):
+        session = self.getSession(request)
+        async with session.lock:
+            board = session.ai_game.board
+            if board.checkIfGameFinished():
+                raise ValueError('Game is already finished')
+            available_moves = board.getNextAvailableBombLocations()
+            hunt_moves = session.ai_game.getHuntMoves()
+            if len(hunt_moves):
+                next_move = random.choice(hunt_moves)
+            else:
+                board_probs = await session.batcher.getBoardProbabilities(board.getInputDimensions())
+                next_move = int(np.argmax(np.where(available_moves == 1, board_probs, -1.0)))
+            return dict(self.applyShot(session.ai_game, next_move), session=session.session_id)
+
+    def applyShot(self, game, location):
+        sunk_mask = game.board.sunk_mask
+        (_, _, is_hit) = game.takeAMove(location)
+        return {
+            'location': int(location),
+            'row': int(location) // game.board_width,
+            'col': int(location) % game.board_width,
+            'hit': bool(is_hit),
+            'sunk': game.board.sunk_mask != sunk_mask,
+            'finished': game.board.checkIfGameFinished()
+        }
+
+    async def getState(self, request):
+        session = self.getSession(request)
+        return {
+            'session': session.session_id,
+            'player_fleet': session.ai_game.board.true_state,
+            'player_board': session.ai_game.board.view_state,
+            'target_board': session.human_game.board.view_state,
+            'player_lost': session.ai_game.board.checkIfGameFinished(),
+            'player_won': session.human_game.board.checkIfGameFinished()
+        }
+
+    async def closeSession(self, request):
+        session = self.getSession(request)
+        del self.sessions[session.session_id]
+        session.close()
+        return {'session': session.session_id, 'closed': True}
+
+    async def getStats(self, request):
+        num_batches = sum(batcher.num_batches for batcher in self.batchers.values())
+        num_requests = sum(batcher.num_requests for batcher in self.batchers.values())
+        cache_hits = sum(getattr(batcher.network, 'hits', 0) for batcher in self.batchers.values())
+        cache_misses = sum(getattr(batcher.network, 'misses', 0) for batcher in self.batchers.values())
+        return {
+            'sessions': len(self.sessions),
+            'batches': num_batches,
+            'inference_requests': num_requests,
+            'mean_batch_size': num_requests / num_batches if num_batches else 0.0,
+            'cache_hit_rate': cache_hits / (cache_hits + cache_misses) if cache_hits + cache_misses else 0.0
+        }
+
+def parseAssignments(values, parse_key):
+    assignments = []
+    for value in values:
+        key, _, path = value.partition('=')
+        if not path:
+            raise argparse.ArgumentTypeError(f'Expected KEY=PATH, got {value!r}')
+        assignments.append((parse_key(key), path))
+    return assignments
+
+async def serve(args):
+    registry = ModelRegistry()
+    for config, model_file in parseAssignments(args.model, getConfig):
+        registry.register(config, model_file)
+    for num_ships, model_file in parseAssignments(args.shared, int):
+        registry.registerShared(num_ships, model_file)
+    game_server = GameServer(
+        registry, args.max_batch_size, args.max_latency_ms / 1000, cache_size=args.cache_size,
+        record_dir=args.record_episodes, allow_custom_configs=args.allow_custom_configs
+    )
+    server = await game_server.start(args.host, args.port)
+    print(f"Serving on {', '.join(str(sock.getsockname()) for sock in server.sockets)}")
+    try:
+        await server.serve_forever()
+    finally:
+        await game_server.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--model', action='append', default=[], metavar='CONFIG=PATH', help='model for one preset configuration')
+    parser.add_argument('--shared', action='append', default=[], metavar='NUM_SHIPS=PATH', help='convolutional model for any board size with this many ships')
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--cache-size', type=int, default=100000, help='LRU entries for the symmetry-canonical inference cache (0 disables it)')
+    parser.add_argument('--allow-custom-configs', action='store_true', help='accept validated board/fleet objects in new, not only preset names')
+    parser.add_argument('--record-episodes', default=None, metavar='DIR', help='append every finished or closed game to compressed episode logs in this directory')
+    parser.add_argument('--max-latency-ms', type=float, default=5.0, help='longest time a move request waits for its batch to fill')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,14 @@
 import pygame
 import sys
+import threading
 import numpy as np
 from Game import Game
 from GameConfig import *
-from DQNNetwork import DQNNetwork
+from ProbabilityDensity import ProbabilityDensity
+from Symmetry import CachedNetwork
 
 class BattleshipGUI:
-    def __init__(self, model_file=None):
+    def __init__(self, model_file=None, opponent='dqn', opening_book=None, episode_log=None):
         pygame.init()
         self.WHITE = (255, 255, 255)
         self.GRAY = (220, 220, 220)
@@ -27,16 +29,52 @@ class BattleshipGUI:
         self.title_font = pygame.font.SysFont('arial', 48, bold=True)
         self.grid_font = pygame.font.SysFont('arial', 36)
         self.cell_font = pygame.font.SysFont('arial', 20)
-        self.network = DQNNetwork(BOARD_WIDTH, BOARD_HEIGHT, len(SHIPS))
-        if model_file:
-            self.network.restoreModel(model_file)
+        self.clock = pygame.time.Clock()
+        self.network = CachedNetwork(ProbabilityDensity(BOARD_WIDTH, BOARD_HEIGHT, SHIPS), BOARD_HEIGHT, BOARD_WIDTH)
         self.ai_game = Game(BOARD_WIDTH, BOARD_HEIGHT, SHIPS, network=self.network)  
         self.human_game = Game(BOARD_WIDTH, BOARD_HEIGHT, SHIPS, network=self.network)  
+        self.recorder = None
+        if episode_log is not None:
+            from EpisodeLog import EpisodeRecorder
+            self.recorder = EpisodeRecorder(episode_log, GameConfig())
+            self.ai_game.recorder = self.recorder
+            self.ai_game.recorder_source = 'human'
+            self.human_game.recorder = self.recorder
+            self.human_game.recorder_source = 'ai'
+        self.model_ready = threading.Event()
+        self.model_status = "AI: density heuristic"
+        if opponent == 'density':
+            self.model_ready.set()
+        else:
+            self.model_status = "AI: loading model (density heuristic until ready)"
+            threading.Thread(target=self.load_network, args=(model_file, opening_book), daemon=True).start()
         self.game_over = False
         self.winner = None
         self.ai_grid_moves = set()  
         self.human_grid_moves = set()  
 
+    def load_network(self, model_file, opening_book=None):
+        try:
+            from ModelRegistry import loadNetwork
+            network = loadNetwork(model_file, GameConfig())
+            network.epsilon = 0.0
+            network = CachedNetwork(network, BOARD_HEIGHT, BOARD_WIDTH)
+            self.network = network
+            self.ai_game.network = network
+            self.human_game.network = network
+            if opening_book is not None:
+                from OpeningBook import OpeningBook
+                self.human_game.opening_book = OpeningBook(opening_book)
+            self.model_status = "AI: model"
+        except Exception as error:
+            print(f"Could not load model {model_file}: {error}")
+            self.model_status = "AI: density heuristic (model failed to load)"
+        self.model_ready.set()
+
+    def draw_status(self):
+        status = self.cell_font.render(self.model_status, True, self.BLACK)
+        self.screen.blit(status, (self.MARGIN, self.WINDOW_HEIGHT - self.MARGIN // 2 - status.get_height() // 2))
+
     def draw_grid_labels(self, x_offset):
         # Draw column labels (numbers)
         for col in range(self.GRID_SIZE):
@@ -60,6 +98,7 @@ class BattleshipGUI:
         # Draw grid labels
         self.draw_grid_labels(x_offset)
         # Draw cells
+        view_state = grid.view_state
         for row in range(self.GRID_SIZE):
             for col in range(self.GRID_SIZE):
                 x = x_offset + col * self.CELL_SIZE + self.MARGIN
@@ -69,7 +108,7 @@ class BattleshipGUI:
                 pygame.draw.rect(self.screen, self.GRAY, rect)
                 pygame.draw.rect(self.screen, self.GRID_LINE, rect, 1)
                 # Draw cell state
-                cell_state = grid.view_state[row][col]
+                cell_state = view_state[row][col]
                 if cell_state == 'X':  # Miss
                     pygame.draw.rect(self.screen, self.BLUE, rect)
                     pygame.draw.circle(self.screen, self.WHITE, (x + self.CELL_SIZE // 2, y + self.CELL_SIZE // 2), self.CELL_SIZE // 6)
@@ -115,7 +154,7 @@ class BattleshipGUI:
         if move_id in self.ai_grid_moves:
             print(f"Move already made on AI's grid: ({row}, {col})")
             return False
-        current_state = self.ai_game.board.view_state[row][col]
+        current_state = self.ai_game.board.getCellViewState(row * BOARD_WIDTH + col)
         print(f"Move state at ({row}, {col}): {current_state}")
         return current_state not in ['X', 'O', '@', '#']
 
@@ -141,13 +180,21 @@ class BattleshipGUI:
             self.game_over = True
             self.winner = "AI"
 
+    def close_recorder(self):
+        if self.recorder is not None:
+            self.ai_game.recordEpisode()
+            self.human_game.recordEpisode()
+            self.recorder.close()
+
     def play(self):
         while True:
             self.screen.fill(self.WHITE)
             self.draw_grid(0, self.ai_game.board, True)  # AI's grid (left)
             self.draw_grid(self.GRID_SIZE * self.CELL_SIZE + self.GRID_PADDING, self.human_game.board, False)  # Human's grid (right)
+            self.draw_status()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    self.close_recorder()
                     pygame.quit()
                     sys.exit()
                 if event.type == pygame.MOUSEBUTTONDOWN and not self.game_over:
@@ -167,6 +214,7 @@ class BattleshipGUI:
             if self.game_over:
                 self.draw_game_over()
             pygame.display.flip()
+            self.clock.tick(60)
 
 if __name__ == "__main__":
     game = BattleshipGUI(r'D:\download\BattleShip\BattleShip\mymodel.keras')
@@ -0,0 +1,75 @@
+import os
+import threading
+from collections import OrderedDict
+from GameConfig import getConfig
+
+def loadNetwork(model_file, config, shared_model=None):
+    """Nạp mạng từ file .keras/.weights.h5, bản xuất NumPy .npz hoặc checkpoint .ckpt của Checkpointer"""
+    if shared_model is None:
+        if not os.path.exists(model_file) and os.path.exists(model_file + '.keras'):
+            model_file += '.keras'
+        if not os.path.exists(model_file):
+            raise FileNotFoundError(f'No such model file {model_file!r}')
+    if model_file.endswith('.npz'):
+        from NumpyNetwork import NumpyNetwork
+        return NumpyNetwork(model_file, board_height=config.board_height, board_width=config.board_width)
+    from DQNNetwork import DQNNetwork
+    if shared_model is None and model_file.endswith('.ckpt'):
+        from Checkpointer import loadCheckpointModel
+        shared_model = loadCheckpointModel(model_file)
+    if shared_model is not None:
+        return DQNNetwork(config.board_width, config.board_height, config.num_ships, model=shared_model)
+    return DQNNetwork(config.board_width, config.board_height, config.num_ships, model_file=model_file)
+
+class ModelRegistry:
+    """Giữ sẵn mạng đã nạp cho từng cấu hình ván, để một tiến trình phục vụ nhiều kích thước bàn cờ mà không phải nạp lại"""
+    def __init__(self, max_networks=8):
+        self.max_networks = max_networks
+        self.model_files = {}
+        self.shared_files = {}
+        self.shared_models = {}
+        self.networks = OrderedDict()
+        self.lock = threading.RLock()
+
+    def register(self, config, model_file):
+        """Gán một file mô hình cho đúng một cấu hình"""
+        config = getConfig(config)
+        with self.lock:
+            self.model_files[config.key] = model_file
+            self.networks.pop(config.key, None)
+
+    def registerShared(self, num_ships, model_file):
+        """Gán một mô hình tích chập cho mọi kích thước bàn cờ có cùng số tàu"""
+        with self.lock:
+            self.shared_files[num_ships] = model_file
+            for key in [key for key in self.networks if len(key[2]) == num_ships and key not in self.model_files]:
+                del self.networks[key]
+
+    def getNetwork(self, config):
+        config = getConfig(config)
+        with self.lock:
+            if config.key in self.networks:
+                self.networks.move_to_end(config.key)
+                return self.networks[config.key]
+            network = self.loadNetwork(config)
+            self.networks[config.key] = network
+            while len(self.networks) > self.max_networks:
+                self.networks.popitem(last=False)
+            return network
+
+    def loadNetwork(self, config):
+        if config.key in self.model_files:
+            network = loadNetwork(self.model_files[config.key], config)
+        elif config.num_ships in self.shared_files:
+            model_file = self.shared_files[config.num_ships]
+            network = loadNetwork(model_file, config, self.shared_models.get(model_file))
+            if hasattr(network, 'model'):
+                self.shared_models[model_file] = network.model
+        else:
+            raise KeyError(f'No model registered for {config!r}')
+        network.epsilon = 0.0
+        return network
+
+    def __contains__(self, config):
+        config = getConfig(config)
+        return config.key in self.model_files or config.num_ships in self.shared_files
@@ -0,0 +1,99 @@
+import json
+import numpy as np
+
+def relu(x):
+    return np.maximum(x, 0)
+
+def softmax(x):
+    x = np.exp(x - x.max(axis=-1, keepdims=True))
+    return x / x.sum(axis=-1, keepdims=True)
+
+def sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': relu,
+    'softmax': softmax,
+    'sigmoid': sigmoid,
+    'tanh': np.tanh
+}
+
+class NumpyNetwork:
+    """Chạy mạng đã xuất bằng DQNNetwork.exportNumpy chỉ với NumPy, không cần TensorFlow"""
+    def __init__(self, export_path, epsilon=0.0, board_height=None, board_width=None):
+        self.epsilon = epsilon
+        with np.load(export_path) as data:
+            self.input_size = int(data['input_size'])
+            self.architecture = str(data['architecture']) if 'architecture' in data else 'dense'
+            self.num_input_dimension = int(data['num_input_dimension']) if 'num_input_dimension' in data else None
+            export_board_shape = tuple(int(size) for size in data['board_shape']) if 'board_shape' in data else None
+            self.layers = []
+            for index, layer in enumerate(json.loads(str(data['layers']))):
+                weights = []
+                while f'layer_{index}_{len(weights)}' in data:
+                    weights.append(data[f'layer_{index}_{len(weights)}'].astype('float32'))
+                self.layers.append((layer['class_name'], layer['config'], weights))
+        self.forward_layers = [self.buildLayer(*layer) for layer in self.layers]
+        self.board_shape = None
+        if self.architecture == 'convolutional':
+            if board_height is None or board_width is None:
+                board_height, board_width = export_board_shape
+            self.board_shape = (board_height, board_width)
+            self.input_size = board_height * board_width * self.num_input_dimension
+
+    def getBoardProbabilities(self, input_dimensions):
+        x = np.reshape(np.asarray(input_dimensions, dtype='float32'), (-1, self.input_size))
+        if self.board_shape is not None:
+            x = x.reshape((len(x), self.num_input_dimension) + self.board_shape).transpose(0, 2, 3, 1)
+        for forward in self.forward_layers:
+            x = forward(x)
+        return x
+
+    def buildLayer(self, class_name, config, weights):
+        activation = ACTIVATIONS[config.get('activation') or 'linear']
+        if class_name in ('InputLayer', 'Dropout'):
+            return lambda x: x
+        if class_name == 'Activation':
+            return activation
+        if class_name == 'Softmax':
+            return softmax
+        if class_name == 'Reshape':
+            target_shape = tuple(config['target_shape'])
+            return lambda x: x.reshape((len(x),) + target_shape)
+        if class_name == 'Flatten':
+            return lambda x: x.reshape(len(x), -1)
+        if class_name == 'Dense':
+            kernel = weights[0]
+            bias = weights[1] if config.get('use_bias', True) else 0.0
+            return lambda x: activation(x @ kernel + bias)
+        if class_name == 'Conv2D':
+            if tuple(config.get('strides', (1, 1))) != (1, 1) or tuple(config.get('dilation_rate', (1, 1))) != (1, 1):
+                raise ValueError('NumpyNetwork only supports Conv2D with stride 1 and no dilation')
+            kernel = weights[0]
+            bias = weights[1] if config.get('use_bias', True) else 0.0
+            same_padding = config.get('padding', 'valid') == 'same'
+            return lambda x: activation(conv2d(x, kernel, same_padding) + bias)
+        if class_name == 'BatchNormalization':
+            weights = list(weights)
+            gamma = weights.pop(0) if config.get('scale', True) else 1.0
+            beta = weights.pop(0) if config.get('center', True) else 0.0
+            moving_mean, moving_variance = weights
+            scale = gamma / np.sqrt(moving_variance + config.get('epsilon', 1e-3))
+            shift = beta - moving_mean * scale
+            return lambda x: x * scale + shift
+        raise ValueError(f'NumpyNetwork does not support layer {class_name}')
+
+def conv2d(x, kernel, same_padding):
+    kernel_height, kernel_width = kernel.shape[:2]
+    if same_padding:
+        pad_top = (kernel_height - 1) // 2
+        pad_left = (kernel_width - 1) // 2
+        x = np.pad(x, ((0, 0), (pad_top, kernel_height - 1 - pad_top), (pad_left, kernel_width - 1 - pad_left), (0, 0)))
+    out_height = x.shape[1] - kernel_height + 1
+    out_width = x.shape[2] - kernel_width + 1
+    out = np.zeros((x.shape[0], out_height, out_width, kernel.shape[3]), dtype='float32')
+    for i in range(kernel_height):
+        for j in range(kernel_width):
+            out += x[:, i:i + out_height, j:j + out_width, :] @ kernel[i, j]
+    return out
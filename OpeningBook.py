@@ -0,0 +1,124 @@
+"""Tính sẵn nước đi mở màn của một chính sách cho mọi trạng thái đạt được tới độ sâu k, gộp các trạng thái đối xứng.
+
+    python OpeningBook.py mymodel.keras --depth 6 --output models/opening
+    python OpeningBook.py density --config 10x10 --depth 5 --output models/opening_10x10
+"""
+import argparse
+import json
+import time
+import numpy as np
+from GameConfig import PRESETS, getConfig
+from Symmetry import canonicalize, getSymmetryPermutations
+
+def encodeKeys(states, board_size, num_ships):
+    """Mã hóa gọn trạng thái: bit đã bắn, bit trúng của từng ô và bit còn nổi của từng tàu"""
+    states = np.asarray(states).reshape(len(states), -1)
+    shots = states[:, :board_size]
+    afloat = states[:, board_size::board_size][:, :num_ships] > 0
+    return np.packbits(np.concatenate([shots != 0, shots > 0, afloat], axis=1), axis=1)
+
+class OpeningBook:
+    """Bảng nước đi mở màn đã tính sẵn, nạp bằng memory map và tra theo dạng chuẩn đối xứng của trạng thái"""
+    def __init__(self, path):
+        with open(path + '.json') as f:
+            self.metadata = json.load(f)
+        self.board_height = self.metadata['board_height']
+        self.board_width = self.metadata['board_width']
+        self.board_size = self.board_height * self.board_width
+        self.num_ships = self.metadata['num_ships']
+        self.keys = np.load(path + '.keys.npy', mmap_mode='r')
+        self.moves = np.load(path + '.moves.npy', mmap_mode='r')
+        self.sorted_keys = self.keys.view(f'V{self.keys.shape[1]}').reshape(-1)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.moves)
+
+    def getMove(self, input_dimensions):
+        _, symmetry_indices, canonical_states = canonicalize(np.reshape(input_dimensions, (1, -1)), self.board_height, self.board_width)
+        key = encodeKeys(canonical_states, self.board_size, self.num_ships).view(self.sorted_keys.dtype)[0, 0]
+        index = np.searchsorted(self.sorted_keys, key)
+        if index == len(self.sorted_keys) or self.sorted_keys[index] != key:
+            self.misses += 1
+            return None
+        self.hits += 1
+        permutations, _ = getSymmetryPermutations(self.board_height, self.board_width)
+        return int(permutations[symmetry_indices[0]][self.moves[index]])
+
+def getChildren(state, move, board_size, ship_lengths):
+    """Các trạng thái có thể sau khi bắn vào ô move: trượt, trúng, hoặc trúng và làm chìm một tàu còn nổi"""
+    miss = state.copy()
+    miss[move] = -1
+    hit = state.copy()
+    hit[move] = 1
+    children = [miss, hit]
+    afloat = state[board_size::board_size] > 0
+    unresolved_hits = int((hit[:board_size] > 0).sum()) - int(sum(length for length, is_afloat in zip(ship_lengths, afloat) if not is_afloat))
+    for ship_index, (length, is_afloat) in enumerate(zip(ship_lengths, afloat)):
+        if is_afloat and unresolved_hits >= length:
+            sunk = hit.copy()
+            sunk[board_size * (ship_index + 1):board_size * (ship_index + 2)] = 0
+            children.append(sunk)
+    return children
+
+def buildOpeningBook(network, config, depth, path, batch_size=4096):
+    """Duyệt theo chiều rộng từ bàn trống, mỗi tầng gọi mạng một lần cho mọi trạng thái chuẩn mới rồi lưu bảng đã sắp xếp"""
+    board_size = config.board_size
+    ship_lengths = [ship['length'] for ship in config.ships]
+    empty_state = np.ones(board_size * (config.num_ships + 1), dtype='float32')
+    empty_state[:board_size] = 0
+    frontier = [empty_state]
+    entries = {}
+    for level in range(depth):
+        keys, _, canonical_states = canonicalize(np.stack(frontier), config.board_height, config.board_width)
+        unique = {}
+        for key, state in zip(keys, canonical_states):
+            if key not in entries and key not in unique:
+                unique[key] = state
+        if not unique:
+            break
+        states = np.stack(list(unique.values()))
+        available_moves = states[:, :board_size] == 0
+        board_probs = np.concatenate([
+            np.asarray(network.getBoardProbabilities(states[start:start + batch_size]))
+            for start in range(0, len(states), batch_size)
+        ])
+        moves = np.argmax(np.where(available_moves, board_probs, -1.0), axis=1)
+        frontier = []
+        for key, state, move in zip(unique, states, moves):
+            entries[key] = (state, int(move))
+            if level + 1 < depth:
+                frontier.extend(getChildren(state, move, board_size, ship_lengths))
+        print(f'Depth {level + 1}: {len(unique)} new states, {len(entries)} total')
+        if not frontier:
+            break
+    states = np.stack([state for (state, _) in entries.values()])
+    encoded = encodeKeys(states, board_size, config.num_ships)
+    order = np.argsort(encoded.view(f'V{encoded.shape[1]}').reshape(-1), kind='stable')
+    np.save(path + '.keys.npy', np.ascontiguousarray(encoded[order]))
+    np.save(path + '.moves.npy', np.array([move for (_, move) in entries.values()], dtype='uint16')[order])
+    with open(path + '.json', 'w') as f:
+        json.dump(dict(config.toDict(), num_ships=config.num_ships, depth=depth, entries=len(entries)), f, indent=2)
+    return len(entries)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('policy', help="'density' or a saved model (.keras, .weights.h5, NumPy .npz export or .ckpt checkpoint)")
+    parser.add_argument('--config', default='5x5', choices=list(PRESETS))
+    parser.add_argument('--depth', type=int, default=6, help='number of opening shots to cover')
+    parser.add_argument('--output', default='models/opening')
+    args = parser.parse_args()
+    config = getConfig(args.config)
+    if args.policy == 'density':
+        from ProbabilityDensity import ProbabilityDensity
+        network = ProbabilityDensity(config.board_width, config.board_height, config.ships, allow_touching=config.allow_touching)
+    else:
+        from ModelRegistry import loadNetwork
+        network = loadNetwork(args.policy, config)
+    start = time.perf_counter()
+    num_entries = buildOpeningBook(network, config, args.depth, args.output)
+    print(f'Saved {num_entries} positions to {args.output}.keys.npy/.moves.npy in {time.perf_counter() - start:.1f}s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+from functools import lru_cache
+import numpy as np
+
+MAX_PLACEMENT_ATTEMPTS = 1000
+
+class PlacementIndex:
+    """Bảng tất cả vị trí đặt một con tàu có độ dài cho trước trên bàn cờ"""
+    __slots__ = (
+        'board_height', 'board_width', 'board_size', 'ship_length', 'placements', 'masks', 'bitmasks', 'words',
+        'halo_masks', 'halo_bitmasks'
+    )
+
+    def __init__(self, board_height, board_width, ship_length):
+        self.board_height = board_height
+        self.board_width = board_width
+        self.board_size = board_height * board_width
+        self.ship_length = ship_length
+        placements = []
+        for i in range(board_height):
+            for j in range(board_width):
+                if j + ship_length <= board_width:
+                    placements.append((i, j, 0))
+                if ship_length > 1 and i + ship_length <= board_height:
+                    placements.append((i, j, 1))
+        self.placements = np.array(placements, dtype='int16').reshape(-1, 3)
+        self.masks = np.zeros((len(placements), self.board_size), dtype=bool)
+        for index, (x, y, z) in enumerate(placements):
+            for k in range(ship_length):
+                location = (x * board_width + y + k) if z == 0 else ((x + k) * board_width + y)
+                self.masks[index, location] = True
+        self.bitmasks = tuple(sum(1 << int(location) for location in np.flatnonzero(mask)) for mask in self.masks)
+        self.words = np.array([getMaskWords(mask, self.board_size) for mask in self.bitmasks], dtype='uint64')
+        self.halo_bitmasks = tuple(getHaloMask(mask, board_height, board_width) for mask in self.bitmasks)
+        self.halo_masks = np.array([
+            [(mask >> location) & 1 for location in range(self.board_size)] for mask in self.halo_bitmasks
+        ], dtype=bool).reshape(-1, self.board_size)
+        self.placements.setflags(write=False)
+        self.masks.setflags(write=False)
+        self.words.setflags(write=False)
+        self.halo_masks.setflags(write=False)
+
+    def __len__(self):
+        return len(self.placements)
+
+    def getPlacement(self, index):
+        x, y, z = self.placements[index]
+        return {'x': int(x), 'y': int(y), 'z': int(z)}
+
+    def getAvailablePlacements(self, occupied_mask):
+        overlap = self.words & getMaskWords(occupied_mask, self.board_size)
+        return np.flatnonzero(~overlap.any(axis=1))
+
+    def getAvailableMatrix(self, occupied):
+        occupied = np.asarray(occupied, dtype='float32')
+        return (occupied @ self.masks.T.astype('float32')) == 0
+
+    def sampleAvailable(self, occupied):
+        available = self.getAvailableMatrix(occupied)
+        keys = np.random.random(available.shape)
+        keys[~available] = -1.0
+        return keys.argmax(axis=1), available.any(axis=1)
+
+@lru_cache(maxsize=None)
+def getPlacementIndex(board_height, board_width, ship_length):
+    return PlacementIndex(board_height, board_width, ship_length)
+
+def getMaskWords(mask, size):
+    num_words = (size + 63) // 64
+    return np.frombuffer(mask.to_bytes(num_words * 8, 'little'), dtype='<u8')
+
+def getHaloMask(mask, board_height, board_width):
+    """Các ô của tàu cùng 8 ô xung quanh, dùng khi luật không cho các tàu chạm nhau"""
+    board_mask = (1 << (board_height * board_width)) - 1
+    first_column = sum(1 << (i * board_width) for i in range(board_height))
+    last_column = first_column << (board_width - 1)
+    row_halo = mask | ((mask << 1) & ~first_column) | ((mask >> 1) & ~last_column)
+    return (row_halo | (row_halo << board_width) | (row_halo >> board_width)) & board_mask
+
+def sampleFleetLayouts(board_height, board_width, ships, num_layouts, allow_touching=True):
+    board_size = board_height * board_width
+    ship_cells = np.zeros((num_layouts, board_size), dtype='int8')
+    pending = np.arange(num_layouts)
+    for _ in range(MAX_PLACEMENT_ATTEMPTS):
+        if not len(pending):
+            return ship_cells
+        layouts = np.zeros((len(pending), board_size), dtype='int8')
+        blocked = np.zeros((len(pending), board_size), dtype=bool)
+        placed = np.ones(len(pending), dtype=bool)
+        for ship_index, ship in enumerate(ships):
+            placement_index = getPlacementIndex(board_height, board_width, ship['length'])
+            choice, has_placement = placement_index.sampleAvailable(blocked)
+            placed &= has_placement
+            layouts += placement_index.masks[choice].astype('int8') * np.int8(ship_index + 1)
+            blocked |= placement_index.masks[choice] if allow_touching else placement_index.halo_masks[choice]
+        ship_cells[pending[placed]] = layouts[placed]
+        pending = pending[~placed]
+    if len(pending):
+        raise ValueError(f'Could not place the fleet on a {board_height}x{board_width} board after {MAX_PLACEMENT_ATTEMPTS} attempts')
+    return ship_cells
+
+def findFleetLayout(board_height, board_width, ship_lengths, allow_touching=True, max_nodes=20000):
+    """Tìm một cách đặt cả hạm đội bằng quay lui, tàu dài đặt trước. Trả về các bitmask của tàu, None nếu không thể đặt,
+    và báo ValueError nếu vượt quá max_nodes bước tìm kiếm"""
+    lengths = sorted(ship_lengths, reverse=True)
+    indices = [getPlacementIndex(board_height, board_width, length) for length in lengths]
+    layout = []
+    nodes = 0
+
+    def place(ship_index, blocked, first_placement):
+        nonlocal nodes
+        if ship_index == len(lengths):
+            return True
+        placement_index = indices[ship_index]
+        for placement in range(first_placement, len(placement_index)):
+            mask = placement_index.bitmasks[placement]
+            if blocked & mask:
+                continue
+            nodes += 1
+            if nodes > max_nodes:
+                raise ValueError(f'Could not decide whether the fleet fits on a {board_height}x{board_width} board')
+            layout.append(mask)
+            next_first = placement + 1 if ship_index + 1 < len(lengths) and lengths[ship_index + 1] == lengths[ship_index] else 0
+            if place(ship_index + 1, blocked | (mask if allow_touching else placement_index.halo_bitmasks[placement]), next_first):
+                return True
+            layout.pop()
+        return False
+
+    return layout if place(0, 0, 0) else None
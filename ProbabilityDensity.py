@@ -0,0 +1,111 @@
+import numpy as np
+from PlacementIndex import getPlacementIndex, getHaloMask
+
+class ProbabilityDensity:
+    """Tính xác suất mỗi ô có tàu bằng cách đếm mọi cách đặt tàu khớp với các phát bắn đã biết"""
+    def __init__(self, board_width, board_height, ships, exact_limit=200000, num_samples=4000, allow_touching=True):
+        self.board_width = board_width
+        self.board_height = board_height
+        self.board_size = board_width * board_height
+        self.ships = ships
+        self.allow_touching = allow_touching
+        self.num_ships = len(ships)
+        self.exact_limit = exact_limit
+        self.num_samples = num_samples
+        self.epsilon = 0.0
+
+    def getBoardProbabilities(self, input_dimensions):
+        input_dimensions = np.reshape(input_dimensions, (-1, self.board_size * (self.num_ships + 1)))
+        board_probs = np.zeros((len(input_dimensions), self.board_size), dtype='float32')
+        for index, row in enumerate(input_dimensions):
+            state_number = row[:self.board_size]
+            afloat = row[self.board_size::self.board_size][:self.num_ships] > 0
+            board_probs[index] = self.getCellProbabilities(state_number, afloat)
+        return board_probs
+
+    def getSupervisedTargets(self, input_dimensions):
+        board_probs = self.getBoardProbabilities(input_dimensions)
+        return board_probs / board_probs.sum(axis=1, keepdims=True)
+
+    def getCellProbabilities(self, state_number, afloat):
+        state_number = np.asarray(state_number).reshape(-1)
+        hits = state_number > 0
+        shots = state_number != 0
+        candidates = self.getCandidatePlacements(hits, state_number < 0, afloat)
+        if np.prod([float(len(masks)) for (bitmasks, masks, halo_masks) in candidates]) <= self.exact_limit:
+            cell_probs = self.countPlacements(candidates, hits)
+        else:
+            cell_probs = self.samplePlacements(candidates, hits)
+        cell_probs = np.where(shots, 0.0, cell_probs)
+        if cell_probs.sum() <= 0:
+            cell_probs = (~shots) / max(np.sum(~shots), 1)
+        return cell_probs.astype('float32')
+
+    def getCandidatePlacements(self, hits, misses, afloat):
+        candidates = []
+        for ship, is_afloat in zip(self.ships, afloat):
+            placement_index = getPlacementIndex(self.board_height, self.board_width, ship['length'])
+            masks = placement_index.masks
+            keep = ~(masks & misses).any(axis=1)
+            covers_only_hits = ~(masks & ~hits).any(axis=1)
+            keep &= ~covers_only_hits if is_afloat else covers_only_hits
+            bitmasks = [placement_index.bitmasks[index] for index in np.flatnonzero(keep)]
+            candidates.append((bitmasks, masks[keep], placement_index.halo_masks[keep]))
+        return candidates
+
+    def countPlacements(self, candidates, hits):
+        hit_mask = sum(1 << int(location) for location in np.flatnonzero(hits))
+        remaining_lengths = [sum(ship['length'] for ship in self.ships[i:]) for i in range(self.num_ships + 1)]
+        memo = {}
+
+        def count(ship_index, occupied_mask):
+            key = (ship_index, occupied_mask)
+            if key in memo:
+                return memo[key]
+            if bin(hit_mask & ~occupied_mask).count('1') > remaining_lengths[ship_index]:
+                result = (0, None)
+            elif ship_index == self.num_ships:
+                result = (1, None)
+            else:
+                total = 0
+                cell_counts = np.zeros(self.board_size, dtype='float64')
+                blocked_mask = occupied_mask if self.allow_touching else getHaloMask(occupied_mask, self.board_height, self.board_width)
+                for mask, mask_array in zip(*candidates[ship_index][:2]):
+                    if blocked_mask & mask:
+                        continue
+                    child_total, child_counts = count(ship_index + 1, occupied_mask | mask)
+                    if child_total == 0:
+                        continue
+                    total += child_total
+                    cell_counts += child_total * mask_array
+                    if child_counts is not None:
+                        cell_counts += child_counts
+                result = (total, cell_counts)
+            memo[key] = result
+            return result
+
+        total, cell_counts = count(0, 0)
+        if total == 0 or cell_counts is None:
+            return np.zeros(self.board_size, dtype='float64')
+        return cell_counts / total
+
+    def samplePlacements(self, candidates, hits):
+        occupied = np.zeros((self.num_samples, self.board_size), dtype=bool)
+        blocked = np.zeros((self.num_samples, self.board_size), dtype=bool)
+        valid = np.ones(self.num_samples, dtype=bool)
+        for (bitmasks, masks, halo_masks) in candidates:
+            if len(masks) == 0:
+                return np.zeros(self.board_size, dtype='float64')
+            available = (blocked.astype('float32') @ masks.T.astype('float32')) == 0
+            keys = np.random.random(available.shape)
+            keys[~available] = -1.0
+            valid &= available.any(axis=1)
+            choice = keys.argmax(axis=1)
+            occupied |= masks[choice]
+            blocked |= masks[choice] if self.allow_touching else halo_masks[choice]
+        covered = (occupied & hits).sum(axis=1)
+        accepted = valid & (covered == hits.sum())
+        if accepted.any():
+            return occupied[accepted].mean(axis=0)
+        weights = np.where(valid, covered + 1.0, 0.0)
+        return weights @ occupied / max(weights.sum(), 1.0)
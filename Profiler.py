@@ -0,0 +1,127 @@
+import cProfile
+import json
+import time
+from contextlib import contextmanager, nullcontext
+
+class NullProfiler:
+    """Profiler rỗng, dùng mặc định để đo đạc không tốn chi phí khi không bật"""
+    enabled = False
+    _null_stage = nullcontext()
+
+    def stage(self, name):
+        return self._null_stage
+
+    def count(self, name, amount=1):
+        pass
+
+    def episode(self, episode):
+        pass
+
+    def log(self, step):
+        return None
+
+    def reset(self):
+        pass
+
+    def close(self):
+        pass
+
+NULL_PROFILER = NullProfiler()
+
+class StageProfiler:
+    """Đo thời gian riêng (đã trừ các giai đoạn con lồng bên trong), số lần gọi của từng giai đoạn và ghi ra log JSON lines hoặc TensorBoard"""
+    enabled = True
+
+    def __init__(self, log_path=None, tensorboard_dir=None, cprofile_window=None, cprofile_path='train.prof'):
+        self.log_path = log_path
+        self.tensorboard_dir = tensorboard_dir
+        self.summary_writer = None
+        self.cprofile_window = cprofile_window
+        self.cprofile_path = cprofile_path
+        self.cprofile = None
+        self.stage_stack = []
+        self.reset()
+
+    def reset(self):
+        self.window_start = time.perf_counter()
+        self.stage_times = {}
+        self.stage_self_times = {}
+        self.stage_calls = {}
+        self.counters = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        self.stage_stack.append(0.0)
+        try:
+            yield
+        finally:
+            total = time.perf_counter() - start
+            child_time = self.stage_stack.pop()
+            if self.stage_stack:
+                self.stage_stack[-1] += total
+            self.stage_times[name] = self.stage_times.get(name, 0.0) + total
+            self.stage_self_times[name] = self.stage_self_times.get(name, 0.0) + total - child_time
+            self.stage_calls[name] = self.stage_calls.get(name, 0) + 1
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def episode(self, episode):
+        if self.cprofile_window is None:
+            return
+        start, end = self.cprofile_window
+        if episode == start and self.cprofile is None:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        elif episode == end and self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.cprofile_path)
+            print(f'cProfile stats for episodes {start}-{end} saved to {self.cprofile_path}')
+            self.cprofile = None
+            self.cprofile_window = None
+
+    def report(self, step):
+        elapsed = max(time.perf_counter() - self.window_start, 1e-9)
+        report = {'step': step, 'wall_time': elapsed, 'stages': {}, 'rates': {}}
+        for name, total in self.stage_times.items():
+            report['stages'][name] = {
+                'time': total,
+                'self_time': self.stage_self_times[name],
+                'calls': self.stage_calls[name],
+                'share': self.stage_self_times[name] / elapsed,
+                'mean_ms': 1000 * total / self.stage_calls[name]
+            }
+        for name, amount in self.counters.items():
+            report['rates'][name + '_per_s'] = amount / elapsed
+        return report
+
+    def log(self, step):
+        report = self.report(step)
+        if self.log_path is not None:
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps(report) + '\n')
+        if self.tensorboard_dir is not None:
+            self.writeSummaries(report)
+        self.reset()
+        return report
+
+    def writeSummaries(self, report):
+        import tensorflow as tf
+        if self.summary_writer is None:
+            self.summary_writer = tf.summary.create_file_writer(self.tensorboard_dir)
+        with self.summary_writer.as_default():
+            for name, stage in report['stages'].items():
+                tf.summary.scalar(f'time_share/{name}', stage['share'], step=report['step'])
+                tf.summary.scalar(f'mean_ms/{name}', stage['mean_ms'], step=report['step'])
+            for name, rate in report['rates'].items():
+                tf.summary.scalar(f'rates/{name}', rate, step=report['step'])
+        self.summary_writer.flush()
+
+    def close(self):
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.cprofile_path)
+            self.cprofile = None
+        if self.summary_writer is not None:
+            self.summary_writer.close()
@@ -0,0 +1,179 @@
+import json
+import os
+import numpy as np
+
+class SumTree:
+    __slots__ = ('capacity', 'leaf_offset', 'depth', 'tree')
+
+    def __init__(self, capacity, tree=None):
+        self.capacity = capacity
+        self.depth = max(1, int(np.ceil(np.log2(capacity))))
+        self.leaf_offset = 1 << self.depth
+        self.tree = np.zeros(2 * self.leaf_offset, dtype='float64') if tree is None else tree
+
+    def total(self):
+        return float(self.tree[1])
+
+    def update(self, indices, priorities):
+        nodes = np.asarray(indices, dtype='int64') + self.leaf_offset
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def get(self, indices):
+        return self.tree[np.asarray(indices, dtype='int64') + self.leaf_offset]
+
+    def find(self, values):
+        values = np.array(values, dtype='float64')
+        nodes = np.ones(len(values), dtype='int64')
+        for _ in range(self.depth):
+            left = 2 * nodes
+            go_right = values > self.tree[left]
+            values -= np.where(go_right, self.tree[left], 0.0)
+            nodes = left + go_right
+        return np.minimum(nodes - self.leaf_offset, self.capacity - 1)
+
+class ReplayBuffer:
+    """Bộ nhớ kinh nghiệm dạng vòng với mảng cấp phát sẵn, hỗ trợ lấy mẫu đều hoặc theo độ ưu tiên"""
+    def __init__(self, capacity, board_size, num_ships, prioritized=False, alpha=0.6, path=None):
+        self.capacity = capacity
+        self.board_size = board_size
+        self.num_ships = num_ships
+        self.prioritized = prioritized
+        self.alpha = alpha
+        self.path = path
+        self.position = 0
+        self.size = 0
+        self.max_priority = 1.0
+        self.stored_priorities = False
+        mode = 'w+'
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            if os.path.exists(os.path.join(path, 'meta.json')):
+                mode = 'r+'
+                self.loadMeta()
+        self.boards = self.createArray('boards', (capacity, board_size), 'int8', mode)
+        self.afloat = self.createArray('afloat', (capacity, num_ships), 'bool', mode)
+        self.actions = self.createArray('actions', (capacity,), 'int16', mode)
+        self.rewards = self.createArray('rewards', (capacity,), 'float32', mode)
+        self.next_boards = self.createArray('next_boards', (capacity, board_size), 'int8', mode)
+        self.next_afloat = self.createArray('next_afloat', (capacity, num_ships), 'bool', mode)
+        self.dones = self.createArray('dones', (capacity,), 'bool', mode)
+        self.sum_tree = None
+        if prioritized:
+            probe = SumTree(capacity)
+            tree_mode = mode if self.stored_priorities else 'w+'
+            self.sum_tree = SumTree(capacity, self.createArray('priorities', probe.tree.shape, 'float64', tree_mode))
+            if tree_mode != mode:
+                self.rebuildPriorities()
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        return cls(meta['capacity'], meta['board_size'], meta['num_ships'], prioritized=meta['prioritized'], alpha=meta['alpha'], path=path)
+
+    def createArray(self, name, shape, dtype, mode):
+        if self.path is None:
+            return np.zeros(shape, dtype=dtype)
+        return np.lib.format.open_memmap(os.path.join(self.path, name + '.npy'), mode=mode, dtype=dtype, shape=shape)
+
+    def loadMeta(self):
+        with open(os.path.join(self.path, 'meta.json')) as f:
+            meta = json.load(f)
+        if (meta['capacity'], meta['board_size'], meta['num_ships']) != (self.capacity, self.board_size, self.num_ships):
+            raise ValueError(f'Replay buffer at {self.path} has a different shape')
+        self.position = meta['position']
+        self.size = meta['size']
+        self.max_priority = meta['max_priority']
+        self.stored_priorities = meta['prioritized'] and meta['alpha'] == self.alpha
+
+    def rebuildPriorities(self):
+        """Mở lại bộ nhớ chưa có cây ưu tiên (hoặc khác alpha): dựng lại độ ưu tiên từ phần thưởng đã lưu như addEpisode"""
+        if self.size > 0:
+            self.updatePriorities(np.arange(self.size), np.abs(self.rewards[:self.size]) + 1e-3)
+
+    def flush(self):
+        if self.path is None:
+            return
+        for array in (self.boards, self.afloat, self.actions, self.rewards, self.next_boards, self.next_afloat, self.dones):
+            array.flush()
+        if self.sum_tree is not None:
+            self.sum_tree.tree.flush()
+        meta = {
+            'capacity': self.capacity,
+            'board_size': self.board_size,
+            'num_ships': self.num_ships,
+            'prioritized': self.prioritized,
+            'alpha': self.alpha,
+            'position': self.position,
+            'size': self.size,
+            'max_priority': self.max_priority
+        }
+        meta_path = os.path.join(self.path, 'meta.json')
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def __len__(self):
+        return self.size
+
+    def encodeStates(self, input_dimensions):
+        input_dimensions = np.reshape(input_dimensions, (-1, self.board_size * (self.num_ships + 1)))
+        boards = input_dimensions[:, :self.board_size].astype('int8')
+        afloat = input_dimensions[:, self.board_size::self.board_size][:, :self.num_ships] > 0
+        return boards, afloat
+
+    def decodeStates(self, boards, afloat):
+        ship_planes = np.repeat(afloat, self.board_size, axis=1)
+        return np.concatenate([boards, ship_planes], axis=1).astype('float32')
+
+    def add(self, state, action, reward, next_state, done, priority=None):
+        self.addBatch([state], [action], [reward], [next_state], [done], None if priority is None else [priority])
+
+    def addBatch(self, states, actions, rewards, next_states, dones, priorities=None):
+        num_items = len(actions)
+        indices = (self.position + np.arange(num_items)) % self.capacity
+        self.boards[indices], self.afloat[indices] = self.encodeStates(states)
+        self.next_boards[indices], self.next_afloat[indices] = self.encodeStates(next_states)
+        self.actions[indices] = actions
+        self.rewards[indices] = rewards
+        self.dones[indices] = dones
+        if self.sum_tree is not None:
+            if priorities is None:
+                priorities = np.full(num_items, self.max_priority)
+            self.updatePriorities(indices, priorities)
+        self.position = int((self.position + num_items) % self.capacity)
+        self.size = min(self.size + num_items, self.capacity)
+        return indices
+
+    def addEpisode(self, input_states, moves, rewards):
+        states = np.reshape(input_states, (len(moves), -1))
+        next_states = np.concatenate([states[1:], states[-1:]])
+        dones = np.zeros(len(moves), dtype=bool)
+        dones[-1] = True
+        priorities = np.abs(rewards) + 1e-3 if self.prioritized else None
+        return self.addBatch(states, moves, rewards, next_states, dones, priorities)
+
+    def sample(self, batch_size, beta=0.4):
+        if self.sum_tree is None:
+            indices = np.random.randint(0, self.size, size=batch_size)
+            weights = np.ones(batch_size, dtype='float32')
+        else:
+            total = self.sum_tree.total()
+            segments = np.linspace(0.0, total, batch_size + 1)
+            values = np.random.uniform(segments[:-1], segments[1:])
+            indices = self.sum_tree.find(values)
+            indices = np.where(indices < self.size, indices, np.random.randint(0, self.size, size=batch_size))
+            probabilities = self.sum_tree.get(indices) / total
+            weights = (self.size * np.maximum(probabilities, 1e-12)) ** -beta
+            weights = (weights / weights.max()).astype('float32')
+        states = self.decodeStates(self.boards[indices], self.afloat[indices])
+        next_states = self.decodeStates(self.next_boards[indices], self.next_afloat[indices])
+        return (states, self.actions[indices].astype('int32'), self.rewards[indices], next_states, self.dones[indices], indices, weights)
+
+    def updatePriorities(self, indices, priorities):
+        priorities = np.asarray(priorities, dtype='float64')
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.sum_tree.update(indices, priorities ** self.alpha)
@@ -0,0 +1,37 @@
+import numpy as np
+
+def padHitLogs(hit_logs):
+    lengths = np.array([len(hit_log) for hit_log in hit_logs], dtype='int64')
+    padded = np.zeros((len(hit_logs), lengths.max() if len(lengths) else 0), dtype='float64')
+    for index, hit_log in enumerate(hit_logs):
+        padded[index, :lengths[index]] = hit_log
+    return padded, lengths
+
+def discountedRewards(hit_logs, lengths, total_ships_lengths, board_size, gamma=0.5):
+    """Phần thưởng chiết khấu đã trừ baseline cho một lô ván đã đệm, tính trong O(T) bằng quét ngược"""
+    hit_logs = np.asarray(hit_logs, dtype='float64')
+    num_moves = hit_logs.shape[1]
+    valid = np.arange(num_moves)[None, :] < np.asarray(lengths)[:, None]
+    hit_logs = np.where(valid, hit_logs, 0.0)
+    previous_hits = np.cumsum(hit_logs, axis=1) - hit_logs
+    remaining_board_size = board_size - np.arange(num_moves, dtype='float64')
+    baseline = np.divide(
+        total_ships_lengths - previous_hits,
+        remaining_board_size,
+        out=np.zeros_like(previous_hits),
+        where=remaining_board_size > 0
+    )
+    advantages = np.where(valid, hit_logs - baseline, 0.0)
+    rewards = np.zeros_like(advantages)
+    running = np.zeros(len(hit_logs), dtype='float64')
+    for index in range(num_moves - 1, -1, -1):
+        running = advantages[:, index] + gamma * running
+        rewards[:, index] = running
+    return rewards
+
+def discountedRewardsList(hit_logs, total_ships_lengths, board_size, gamma=0.5):
+    if not hit_logs:
+        return []
+    padded, lengths = padHitLogs(hit_logs)
+    rewards = discountedRewards(padded, lengths, total_ships_lengths, board_size, gamma)
+    return [rewards[index, :length] for index, length in enumerate(lengths)]
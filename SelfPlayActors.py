@@ -0,0 +1,127 @@
+import multiprocessing as mp
+import queue
+import numpy as np
+
+class ActorNetwork:
+    def __init__(self, model, epsilon, board_height, board_width):
+        self.model = model
+        self.epsilon = epsilon
+        self.board_shape = (board_height, board_width) if len(model.input_shape) == 4 else None
+
+    def getBoardProbabilities(self, input_dimensions):
+        if self.board_shape is not None:
+            input_dimensions = input_dimensions.reshape((len(input_dimensions), -1) + self.board_shape).transpose(0, 2, 3, 1)
+        return self.model(input_dimensions, training=False).numpy()
+
+def runActor(actor_id, model_json, weights_queue, experience_queue, stop_event, board_height, board_width, ships, num_games, allow_touching, record_dir):
+    import os
+    import tensorflow as tf
+    from Game import BatchGame
+    from GameConfig import GameConfig
+    from EpisodeLog import EpisodeRecorder
+    tf.config.threading.set_intra_op_parallelism_threads(1)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    weights, epsilon = weights_queue.get()
+    network = ActorNetwork(tf.keras.models.model_from_json(model_json), epsilon, board_height, board_width)
+    network.model.set_weights(weights)
+    batch_game = BatchGame(num_games, board_height, board_width, ships, network=network, allow_touching=allow_touching)
+    if record_dir is not None:
+        batch_game.recorder = EpisodeRecorder(os.path.join(record_dir, f'actor_{actor_id}.bin'), GameConfig(board_height, board_width, ships, allow_touching))
+    try:
+        playGames(batch_game, network, num_games, weights_queue, experience_queue, stop_event)
+    finally:
+        if batch_game.recorder is not None:
+            batch_game.recorder.close()
+
+def playGames(batch_game, network, num_games, weights_queue, experience_queue, stop_event):
+    rows = np.arange(num_games)
+    step_states = np.zeros(batch_game.input_dimensions.shape, dtype='float32')
+    states = np.zeros((num_games, batch_game.board_size, batch_game.input_dimensions.shape[1]), dtype='int8')
+    all_moves = np.zeros((num_games, batch_game.board_size), dtype='int64')
+    all_hits = np.zeros((num_games, batch_game.board_size), dtype='int64')
+    lengths = np.zeros(num_games, dtype='int64')
+    while not stop_event.is_set():
+        try:
+            weights, network.epsilon = weights_queue.get_nowait()
+            network.model.set_weights(weights)
+        except queue.Empty:
+            pass
+        (input_dimensions, moves, hits, finished) = batch_game.takeMoves(out=step_states)
+        states[rows, lengths] = input_dimensions
+        all_moves[rows, lengths] = moves
+        all_hits[rows, lengths] = hits
+        lengths += 1
+        for index in np.flatnonzero(finished):
+            length = lengths[index]
+            episode = (states[index, :length].copy(), all_moves[index, :length].tolist(), all_hits[index, :length].tolist())
+            lengths[index] = 0
+            while not stop_event.is_set():
+                try:
+                    experience_queue.put(episode, timeout=0.5)
+                    break
+                except queue.Full:
+                    pass
+
+class SelfPlayActors:
+    """Chạy nhiều tiến trình tự chơi song song, gửi các ván đã chơi về learner qua hàng đợi"""
+    def __init__(self, network, board_height, board_width, ships, num_actors, num_games=8, queue_size=256, allow_touching=True, record_dir=None):
+        self.network = network
+        self.allow_touching = allow_touching
+        self.record_dir = record_dir
+        self.board_height = board_height
+        self.board_width = board_width
+        self.ships = ships
+        self.num_actors = num_actors
+        self.num_games = num_games
+        self.context = mp.get_context('spawn')
+        self.experience_queue = self.context.Queue(maxsize=queue_size)
+        self.weights_queues = [self.context.Queue(maxsize=1) for _ in range(num_actors)]
+        self.stop_event = self.context.Event()
+        self.processes = []
+
+    def start(self):
+        model_json = self.network.model.to_json()
+        self.syncWeights()
+        for actor_id in range(self.num_actors):
+            process = self.context.Process(
+                target=runActor,
+                args=(actor_id, model_json, self.weights_queues[actor_id], self.experience_queue, self.stop_event,
+                      self.board_height, self.board_width, self.ships, self.num_games, self.allow_touching, self.record_dir),
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+
+    def syncWeights(self):
+        weights = self.network.model.get_weights()
+        for weights_queue in self.weights_queues:
+            try:
+                weights_queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                weights_queue.put_nowait((weights, self.network.epsilon))
+            except queue.Full:
+                pass
+
+    def getEpisodes(self, max_episodes, timeout=60):
+        episodes = [self.experience_queue.get(timeout=timeout)]
+        while len(episodes) < max_episodes:
+            try:
+                episodes.append(self.experience_queue.get_nowait())
+            except queue.Empty:
+                break
+        return episodes
+
+    def stop(self):
+        self.stop_event.set()
+        while True:
+            try:
+                self.experience_queue.get_nowait()
+            except queue.Empty:
+                break
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
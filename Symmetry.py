@@ -0,0 +1,120 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
+
+@lru_cache(maxsize=None)
+def getSymmetryPermutations(board_height, board_width):
+    """Hoán vị ô của các phép đối xứng nhị diện: 8 phép với bàn vuông, 4 phép với bàn chữ nhật.
+    Bàn sau biến đổi là board[permutation], nên nước đi a trở thành inverse[a]."""
+    cells = np.arange(board_height * board_width).reshape(board_height, board_width)
+    transforms = [cells, cells[::-1, :], cells[:, ::-1], cells[::-1, ::-1]]
+    if board_height == board_width:
+        transforms += [cells.T, cells.T[::-1, :], cells.T[:, ::-1], cells.T[::-1, ::-1]]
+    permutations = np.stack([transform.reshape(-1) for transform in transforms])
+    inverses = np.argsort(permutations, axis=1)
+    permutations.setflags(write=False)
+    inverses.setflags(write=False)
+    return permutations, inverses
+
+def augmentBatch(states, actions, advantages, board_height, board_width):
+    """Nhân một lô chuyển trạng thái thành mọi bản đối xứng, đánh lại chỉ số nước đi cho từng bản"""
+    board_size = board_height * board_width
+    permutations, inverses = getSymmetryPermutations(board_height, board_width)
+    states = np.asarray(states)
+    planes = states.reshape(len(states), -1, board_size)
+    augmented_states = planes[:, :, permutations].transpose(2, 0, 1, 3).reshape(len(permutations) * len(states), -1)
+    augmented_actions = inverses[:, np.asarray(actions, dtype='int64')].reshape(-1)
+    augmented_advantages = np.tile(np.asarray(advantages), len(permutations))
+    return augmented_states.astype(states.dtype, copy=False), augmented_actions, augmented_advantages
+
+def canonicalize(states, board_height, board_width):
+    """Đưa mỗi trạng thái về dạng chuẩn (bản đối xứng nhỏ nhất theo thứ tự từ điển); trả về khóa băm, chỉ số phép biến đổi và trạng thái chuẩn"""
+    board_size = board_height * board_width
+    permutations, _ = getSymmetryPermutations(board_height, board_width)
+    states = np.asarray(states, dtype='float32').reshape(len(states), -1)
+    planes = states.reshape(len(states), -1, board_size)
+    candidates = planes[:, :, permutations].transpose(0, 2, 1, 3).reshape(len(states), len(permutations), -1)
+    encoded = candidates.astype('int8')
+    keys = []
+    symmetry_indices = np.zeros(len(states), dtype='int64')
+    for index in range(len(states)):
+        options = [encoded[index, symmetry].tobytes() for symmetry in range(len(permutations))]
+        symmetry_indices[index] = min(range(len(options)), key=options.__getitem__)
+        keys.append(options[symmetry_indices[index]])
+    return keys, symmetry_indices, candidates[np.arange(len(states)), symmetry_indices]
+
+class CachedNetwork:
+    """Bọc một mạng bằng bộ nhớ đệm LRU theo trạng thái chuẩn, để các thế cờ lặp lại (nhất là đầu ván) không phải suy luận lại"""
+    def __init__(self, network, board_height, board_width, max_entries=100000):
+        self.network = network
+        self.board_height = board_height
+        self.board_width = board_width
+        self.board_size = board_height * board_width
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def epsilon(self):
+        return self.network.epsilon
+
+    @epsilon.setter
+    def epsilon(self, value):
+        self.network.epsilon = value
+
+    def __getattr__(self, name):
+        if name == 'network':
+            raise AttributeError(name)
+        return getattr(self.network, name)
+
+    def getBoardProbabilities(self, input_dimensions):
+        input_dimensions = np.asarray(input_dimensions, dtype='float32')
+        input_dimensions = input_dimensions.reshape(len(input_dimensions) if input_dimensions.ndim > 1 else 1, -1)
+        keys, symmetry_indices, canonical_states = canonicalize(input_dimensions, self.board_height, self.board_width)
+        _, inverses = getSymmetryPermutations(self.board_height, self.board_width)
+        canonical_probs = [None] * len(keys)
+        missing = {}
+        with self.lock:
+            for index, key in enumerate(keys):
+                canonical_probs[index] = self.lookup(key)
+                if canonical_probs[index] is None:
+                    missing.setdefault(key, []).append(index)
+        if missing:
+            first_rows = [indices[0] for indices in missing.values()]
+            board_probs = np.asarray(self.network.getBoardProbabilities(canonical_states[first_rows]))
+            with self.lock:
+                for (key, indices), probs in zip(missing.items(), board_probs):
+                    probs = probs.copy()
+                    probs.setflags(write=False)
+                    self.entries[key] = probs
+                    for index in indices:
+                        canonical_probs[index] = probs
+                    self.misses += len(indices)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return np.stack([probs[inverses[symmetry]] for probs, symmetry in zip(canonical_probs, symmetry_indices)])
+
+    def lookup(self, key):
+        probs = self.entries.get(key)
+        if probs is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return probs
+
+    def getCachedProbabilities(self, input_dimensions):
+        """Xác suất của một trạng thái nếu đã có trong bộ nhớ đệm, ngược lại trả về None mà không gọi mạng"""
+        keys, symmetry_indices, _ = canonicalize(np.reshape(input_dimensions, (1, -1)), self.board_height, self.board_width)
+        with self.lock:
+            probs = self.lookup(keys[0])
+        if probs is None:
+            return None
+        _, inverses = getSymmetryPermutations(self.board_height, self.board_width)
+        return probs[inverses[symmetry_indices[0]]]
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
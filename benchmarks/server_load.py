@@ -0,0 +1,92 @@
+"""Đo tải GameServer: nhiều người chơi giả lập cùng kết nối, mỗi người liên tục yêu cầu nước đi của AI.
+
+So sánh --max-batch-size 1 (mỗi nước một lượt suy luận) với gom lô để thấy lợi ích của MoveBatcher.
+
+    python benchmarks/server_load.py --players 200 --model mymodel.keras
+    python benchmarks/server_load.py --players 200 --model mymodel.keras --max-batch-size 1
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from GameConfig import getConfig
+from GameServer import GameServer
+from ModelRegistry import ModelRegistry
+
+async def request(reader, writer, message):
+    writer.write(json.dumps(message).encode() + b'\n')
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+async def runPlayer(port, config, deadline, latencies):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    games = 0
+    try:
+        while time.perf_counter() < deadline:
+            session = (await request(reader, writer, {'op': 'new', 'config': config}))['session']
+            finished = False
+            while not finished and time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await request(reader, writer, {'op': 'ai_move', 'session': session})
+                latencies.append(time.perf_counter() - start)
+                finished = response['finished']
+            games += finished
+            await request(reader, writer, {'op': 'close', 'session': session})
+    finally:
+        writer.close()
+    return games
+
+async def runLoad(args):
+    registry = ModelRegistry()
+    if args.model:
+        registry.register(args.config, args.model)
+    game_server = GameServer(registry, args.max_batch_size, args.max_latency_ms / 1000, cache_size=args.cache_size)
+    server = await game_server.start('127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    await game_server.getBatcher(getConfig(args.config))
+    latencies = []
+    start = time.perf_counter()
+    games = await asyncio.gather(*[runPlayer(port, args.config, start + args.duration, latencies) for _ in range(args.players)])
+    elapsed = time.perf_counter() - start
+    stats = await game_server.getStats({})
+    await game_server.stop()
+    latencies = np.array(latencies)
+    return {
+        'players': args.players,
+        'max_batch_size': args.max_batch_size,
+        'max_latency_ms': args.max_latency_ms,
+        'moves_per_second': len(latencies) / elapsed,
+        'games_per_second': sum(games) / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p95_ms': float(np.percentile(latencies, 95) * 1000),
+        'mean_batch_size': stats['mean_batch_size'],
+        'cache_hit_rate': stats['cache_hit_rate']
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--players', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--config', default='5x5')
+    parser.add_argument('--model', default=None, help='model served for --config (density heuristic if omitted)')
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-latency-ms', type=float, default=5.0)
+    parser.add_argument('--cache-size', type=int, default=100000)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+    result = asyncio.run(runLoad(args))
+    for name, value in result.items():
+        print(f"{name:20s} {value:.2f}" if isinstance(value, float) else f"{name:20s} {value}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Đo thời gian khởi động HumanPlay: mở cửa sổ, nước đi AI đầu tiên và lúc mô hình nạp xong.
+
+Mỗi kịch bản chạy trong một tiến trình Python mới để đo khởi động nguội.
+
+    python benchmarks/startup.py --model mymodel.keras --repeats 3 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    'import_tensorflow': """
+import tensorflow
+""",
+    'network_build_then_restore': """
+from GameConfig import *
+from DQNNetwork import DQNNetwork
+network = DQNNetwork(BOARD_WIDTH, BOARD_HEIGHT, len(SHIPS))
+network.restoreModel(MODEL_FILE)
+""",
+    'network_direct_load': """
+from GameConfig import *
+from DQNNetwork import DQNNetwork
+network = DQNNetwork(BOARD_WIDTH, BOARD_HEIGHT, len(SHIPS), model_file=MODEL_FILE)
+""",
+    'gui_window': """
+from HumanPlay import BattleshipGUI
+gui = BattleshipGUI(MODEL_FILE)
+gui.screen.fill(gui.WHITE)
+gui.draw_grid(0, gui.ai_game.board, True)
+import pygame
+pygame.display.flip()
+""",
+    'gui_first_ai_move': """
+from HumanPlay import BattleshipGUI
+gui = BattleshipGUI(MODEL_FILE)
+gui.make_ai_move()
+""",
+    'gui_model_ready': """
+from HumanPlay import BattleshipGUI
+gui = BattleshipGUI(MODEL_FILE)
+gui.model_ready.wait()
+gui.make_ai_move()
+""",
+}
+
+def runScenario(code, model_file):
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy', TF_CPP_MIN_LOG_LEVEL='3')
+    script = f'MODEL_FILE = {model_file!r}\n' + code
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', script], cwd=REPO_DIR, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='mymodel.keras')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--scenarios', nargs='*', default=list(SCENARIOS))
+    args = parser.parse_args()
+    baseline = [runScenario('pass', args.model) for _ in range(args.repeats)]
+    results = {'python_startup_s': statistics.median(baseline), 'model': args.model, 'scenarios': {}}
+    for name in args.scenarios:
+        timings = [runScenario(SCENARIOS[name], args.model) for _ in range(args.repeats)]
+        results['scenarios'][name] = {'median_s': statistics.median(timings), 'min_s': min(timings), 'runs_s': timings}
+        print(f"{name:28s} median {statistics.median(timings):7.3f}s  min {min(timings):7.3f}s")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
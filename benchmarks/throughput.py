@@ -0,0 +1,144 @@
+"""Đo thông lượng các đường nóng: mô phỏng bàn cờ, suy luận và huấn luyện, ở bàn 5x5 và 10x10.
+
+    python benchmarks/throughput.py --output bench.json
+    python benchmarks/throughput.py --skip-tensorflow --duration 0.5
+    python benchmarks/throughput.py --output new.json --compare old.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from Game import Game, BatchGame
+from GameConfig import *
+
+CONFIGS = {name: (config.board_height, config.board_width, config.ships) for name, config in PRESETS.items() if config.allow_touching}
+
+def measure(step, duration, items_per_step=1):
+    step()
+    count = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    timings = []
+    while elapsed < duration or count < 3:
+        step_start = time.perf_counter()
+        step()
+        timings.append(time.perf_counter() - step_start)
+        count += 1
+        elapsed = time.perf_counter() - start
+    timings = np.array(timings)
+    return {
+        'per_second': count * items_per_step / elapsed,
+        'mean_ms': float(timings.mean() * 1000),
+        'p50_ms': float(np.percentile(timings, 50) * 1000),
+        'p95_ms': float(np.percentile(timings, 95) * 1000),
+        'steps': count
+    }
+
+def playRandomGame(game):
+    game.resetBoard()
+    while game.takeAMove()[0] is not None:
+        pass
+
+def benchSimulation(board_height, board_width, ships, duration):
+    game = Game(board_height, board_width, ships)
+    board_size = board_height * board_width
+    results = {'board_resets': measure(game.resetBoard, duration)}
+
+    def placeBombs():
+        game.resetBoard()
+        for location in np.random.permutation(board_size):
+            game.board.placeBombAndCheckIfHit(location)
+    results['place_bomb_calls'] = measure(placeBombs, duration, items_per_step=board_size)
+    results['random_games'] = measure(lambda: playRandomGame(game), duration)
+    batch_game = BatchGame(256, board_height, board_width, ships)
+    finished_games = []
+
+    def batchSteps():
+        finished_games.append(int(batch_game.takeMoves()[3].sum()))
+    results['batch_game_moves'] = measure(batchSteps, duration, items_per_step=batch_game.num_games)
+    steps = results['batch_game_moves']['steps']
+    measured_time = steps * results['batch_game_moves']['mean_ms'] / 1000
+    results['batch_game_games'] = {'per_second': sum(finished_games[-steps:]) / measured_time}
+    return results
+
+def benchTensorflow(board_height, board_width, ships, duration, batch_size):
+    from DQNNetwork import DQNNetwork
+    from train import TrainGame
+    network = DQNNetwork(board_width, board_height, len(ships))
+    network.epsilon = 0.0
+    input_size = network.model.input_shape[-1]
+    single = np.random.randint(-1, 2, (1, input_size)).astype('float32')
+    batch = np.random.randint(-1, 2, (batch_size, input_size)).astype('float32')
+    actions = np.random.randint(0, board_height * board_width, batch_size)
+    advantages = np.random.randn(batch_size).astype('float32')
+    results = {
+        'inference_single': measure(lambda: network.getBoardProbabilities(single), duration),
+        'inference_batch': measure(lambda: network.getBoardProbabilities(batch), duration, items_per_step=batch_size),
+        'run_train_step_single': measure(lambda: network.runTrainStep(single, [int(actions[0])], float(advantages[0])), duration),
+        'train_batch': measure(lambda: network.trainBatch(batch, actions, advantages), duration, items_per_step=batch_size)
+    }
+    train_game = TrainGame(board_height=board_height, board_width=board_width, ships=ships)
+    train_game.network.epsilon = 0.0
+    results['self_play_one_game'] = measure(train_game.selfPlayOneGame, duration)
+    results['self_play_batch'] = measure(lambda: train_game.selfPlayBatch(train_game.num_parallel_games), duration, items_per_step=train_game.num_parallel_games)
+    return results
+
+def getMetadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=2.0, help='seconds spent on each measurement')
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--configs', nargs='*', default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument('--skip-tensorflow', action='store_true')
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--compare', default=None, help='earlier JSON report to print speedups against')
+    args = parser.parse_args()
+    np.random.seed(0)
+    report = {'metadata': getMetadata(), 'results': {}}
+    for name in args.configs:
+        board_height, board_width, ships = CONFIGS[name]
+        results = benchSimulation(board_height, board_width, ships, args.duration)
+        if not args.skip_tensorflow:
+            results.update(benchTensorflow(board_height, board_width, ships, args.duration, args.batch_size))
+        report['results'][name] = results
+        for bench_name, result in results.items():
+            print(f"{name:6s} {bench_name:28s} {result['per_second']:12.1f}/s" + (f"  p50 {result['p50_ms']:8.3f} ms" if 'p50_ms' in result else ''))
+    if 'tensorflow' in sys.modules:
+        report['metadata']['tensorflow'] = sys.modules['tensorflow'].__version__
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        print(f"Speedup against {args.compare} (commit {previous['metadata'].get('commit')}):")
+        for name, results in report['results'].items():
+            for bench_name, result in results.items():
+                old_result = previous['results'].get(name, {}).get(bench_name)
+                if old_result:
+                    print(f"{name:6s} {bench_name:28s} x{result['per_second'] / old_result['per_second']:.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""Đấu các chính sách với nhau trên cùng một tập bàn cờ có seed, không cần giao diện.
+
+Chính sách:
+    random              bắn ngẫu nhiên
+    hunting             BatchHuntingStrategy, còn lại bắn ngẫu nhiên
+    density             ProbabilityDensity (không dùng chế độ săn)
+    path.keras|.npz|.ckpt chỉ dùng mạng đã lưu
+    hybrid:path         Game đầy đủ: chế độ săn rồi tới mạng đã lưu
+
+    python evaluate.py random hunting hybrid:mymodel.keras --games 5000 --output results.json --csv results.csv
+    python evaluate.py models/new.keras mymodel.keras --gate models/new.keras mymodel.keras
+    python evaluate.py hunting density models/classic.ckpt --config 10x10
+"""
+import argparse
+import csv
+import json
+import multiprocessing as mp
+import os
+import random
+import sys
+import time
+import numpy as np
+from Game import Game
+from GameConfig import *
+from Symmetry import CachedNetwork
+from OpeningBook import OpeningBook
+
+PERCENTILES = (5, 25, 50, 75, 95)
+_policies = {}
+_opening_books = {}
+
+def loadNetwork(model_file, config):
+    from ModelRegistry import loadNetwork
+    return loadNetwork(model_file, config)
+
+def buildPolicy(spec, config):
+    if spec == 'random':
+        return None, False
+    if spec == 'hunting':
+        return None, True
+    if spec == 'density':
+        from ProbabilityDensity import ProbabilityDensity
+        return ProbabilityDensity(config.board_width, config.board_height, config.ships, allow_touching=config.allow_touching), False
+    if spec.startswith('hybrid:'):
+        network = loadNetwork(spec[len('hybrid:'):], config)
+        network.epsilon = 0.0
+        return network, True
+    network = loadNetwork(spec, config)
+    network.epsilon = 0.0
+    return network, False
+
+def getPolicy(spec, config, cache_size=0):
+    if (spec, config, cache_size) not in _policies:
+        network, use_hunting = buildPolicy(spec, config)
+        if network is not None and cache_size > 0:
+            network = CachedNetwork(network, config.board_height, config.board_width, cache_size)
+        _policies[(spec, config, cache_size)] = (network, use_hunting)
+    return _policies[(spec, config, cache_size)]
+
+def getOpeningBook(path):
+    if path not in _opening_books:
+        _opening_books[path] = OpeningBook(path)
+    return _opening_books[path]
+
+def playSeededGame(spec, seed, cache_size=0, book=None, config='5x5'):
+    config = getConfig(config)
+    network, use_hunting = getPolicy(spec, config, cache_size)
+    opening_book = getOpeningBook(book) if book and network is not None else None
+    game = config.createGame(network=network, opening_book=opening_book)
+    random.seed(seed)
+    game.resetBoard()
+    random.seed(seed + 1000003)
+    np.random.seed(seed % (2 ** 32))
+    shots = 0
+    while not game.board.checkIfGameFinished():
+        next_move = None
+        if not use_hunting:
+            next_move = game.getBestMoveBasedOnModel(game.board.getInputDimensions(), game.board.getNextAvailableBombLocations())
+        game.takeAMove(next_move)
+        shots += 1
+    return shots
+
+def evaluateChunk(args):
+    spec, seeds, cache_size, book, config = args
+    return [playSeededGame(spec, seed, cache_size, book, config) for seed in seeds]
+
+def evaluatePolicy(spec, seeds, pool, chunk_size, cache_size=0, book=None, config='5x5'):
+    start = time.perf_counter()
+    chunks = [(spec, seeds[i:i + chunk_size], cache_size, book, config) for i in range(0, len(seeds), chunk_size)]
+    if pool is None:
+        results = list(map(evaluateChunk, chunks))
+    else:
+        results = pool.map(evaluateChunk, chunks)
+    elapsed = time.perf_counter() - start
+    shots = np.array([shot for chunk in results for shot in chunk], dtype='int64')
+    return shots, elapsed
+
+def summarize(spec, shots, elapsed):
+    summary = {
+        'policy': spec,
+        'games': int(len(shots)),
+        'mean_shots': float(shots.mean()),
+        'std_shots': float(shots.std()),
+        'min_shots': int(shots.min()),
+        'max_shots': int(shots.max()),
+        'games_per_second': float(len(shots) / elapsed) if elapsed > 0 else float('inf')
+    }
+    for percentile, value in zip(PERCENTILES, np.percentile(shots, PERCENTILES)):
+        summary[f'p{percentile}_shots'] = float(value)
+    return summary
+
+def headToHead(shots_a, shots_b):
+    return float(np.mean(np.where(shots_a < shots_b, 1.0, np.where(shots_a == shots_b, 0.5, 0.0))))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('policies', nargs='+')
+    parser.add_argument('--config', default='5x5', choices=list(PRESETS), help='board size, fleet and placement rules to play on')
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=100)
+    parser.add_argument('--cache-size', type=int, default=0, help='LRU entries for the symmetry-canonical inference cache (0 disables it)')
+    parser.add_argument('--book', nargs=2, action='append', default=[], metavar=('POLICY', 'BOOK'),
+                        help='opening book (path prefix written by OpeningBook.py) consulted before POLICY calls its network')
+    parser.add_argument('--output', default=None, help='JSON file for the full report')
+    parser.add_argument('--csv', default=None, help='CSV file with one summary row per policy')
+    parser.add_argument('--gate', nargs=2, metavar=('CANDIDATE', 'BASELINE'), default=None,
+                        help='exit with status 1 unless CANDIDATE beats BASELINE head to head')
+    parser.add_argument('--margin', type=float, default=0.0, help='win rate above 0.5 the candidate needs to pass --gate')
+    args = parser.parse_args()
+
+    policies = list(dict.fromkeys(args.policies + (args.gate or [])))
+    seeds = list(range(args.seed, args.seed + args.games))
+    pool = mp.get_context('spawn').Pool(args.workers) if args.workers > 1 else None
+    try:
+        all_shots = {}
+        summaries = []
+        for spec in policies:
+            shots, elapsed = evaluatePolicy(spec, seeds, pool, args.chunk_size, args.cache_size, dict(args.book).get(spec), args.config)
+            all_shots[spec] = shots
+            summaries.append(summarize(spec, shots, elapsed))
+            print(f"{spec:30s} mean {shots.mean():6.2f}  p50 {np.median(shots):5.1f}  p95 {np.percentile(shots, 95):5.1f}  {summaries[-1]['games_per_second']:8.1f} games/s")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    head_to_head = {a: {b: headToHead(all_shots[a], all_shots[b]) for b in policies if b != a} for a in policies}
+    for a in policies:
+        print(f"{a:30s} " + '  '.join(f"vs {b}: {rate:.3f}" for b, rate in head_to_head[a].items()))
+    config = getConfig(args.config)
+    report = {
+        'config': args.config,
+        'board_height': config.board_height,
+        'board_width': config.board_width,
+        'ships': config.ships,
+        'allow_touching': config.allow_touching,
+        'games': args.games,
+        'seed': args.seed,
+        'summaries': summaries,
+        'head_to_head': head_to_head
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(summaries[0]))
+            writer.writeheader()
+            writer.writerows(summaries)
+    if args.gate:
+        candidate, baseline = args.gate
+        win_rate = head_to_head[candidate][baseline]
+        passed = win_rate > 0.5 + args.margin
+        print(f"Gate {candidate} vs {baseline}: win rate {win_rate:.3f} -> {'PASS' if passed else 'FAIL'}")
+        if not passed:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
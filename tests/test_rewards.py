@@ -0,0 +1,71 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from GameConfig import getConfig
+from Rewards import discountedRewards, discountedRewardsList, padHitLogs
+
+GAMMAS = (0.1, 0.5, 0.9, 1.0)
+CONFIGS = ('5x5', '10x10')
+
+def referenceRewards(hit_log, total_ships_lengths, board_size, gamma=0.5):
+    """Công thức O(n^2) ban đầu của TrainGame.rewardsCalculator, giữ nguyên để làm chuẩn so sánh"""
+    hit_log_weighted = []
+    for index, item in enumerate(hit_log):
+        remaining_ships_length = total_ships_lengths - sum(hit_log[:index])
+        remaining_board_size = board_size - index
+        if remaining_board_size > 0:
+            weighted_item = (item - float(remaining_ships_length) / float(remaining_board_size)) * (gamma ** index)
+        else:
+            weighted_item = item
+        hit_log_weighted.append(weighted_item)
+    return [((gamma) ** (-i)) * sum(hit_log_weighted[i:]) for i in range(len(hit_log))]
+
+def sampleHitLogs(config, num_episodes, seed):
+    """Các ván ngẫu nhiên hợp lệ: đủ số ô tàu bị trúng, nước cuối luôn trúng, độ dài khác nhau"""
+    rng = np.random.default_rng(seed)
+    total_ships_lengths = sum(ship['length'] for ship in config.ships)
+    hit_logs = []
+    for _ in range(num_episodes):
+        length = int(rng.integers(total_ships_lengths, config.board_size + 1))
+        hit_log = np.zeros(length, dtype='int64')
+        hit_log[rng.choice(length - 1, total_ships_lengths - 1, replace=False)] = 1
+        hit_log[-1] = 1
+        hit_logs.append(hit_log.tolist())
+    return hit_logs
+
+@pytest.mark.parametrize('config_name', CONFIGS)
+@pytest.mark.parametrize('gamma', GAMMAS)
+def test_padded_batch_matches_reference(config_name, gamma):
+    config = getConfig(config_name)
+    total_ships_lengths = sum(ship['length'] for ship in config.ships)
+    hit_logs = sampleHitLogs(config, 32, seed=len(config_name))
+    padded, lengths = padHitLogs(hit_logs)
+    rewards = discountedRewards(padded, lengths, total_ships_lengths, config.board_size, gamma)
+    assert rewards.shape == padded.shape
+    for index, hit_log in enumerate(hit_logs):
+        expected = referenceRewards(hit_log, total_ships_lengths, config.board_size, gamma)
+        np.testing.assert_allclose(rewards[index, :lengths[index]], expected, rtol=1e-9, atol=1e-9)
+        assert np.all(rewards[index, lengths[index]:] == 0)
+
+@pytest.mark.parametrize('config_name', CONFIGS)
+@pytest.mark.parametrize('gamma', GAMMAS)
+def test_reward_list_matches_reference(config_name, gamma):
+    config = getConfig(config_name)
+    total_ships_lengths = sum(ship['length'] for ship in config.ships)
+    hit_logs = sampleHitLogs(config, 16, seed=7)
+    rewards = discountedRewardsList(hit_logs, total_ships_lengths, config.board_size, gamma)
+    assert [len(reward) for reward in rewards] == [len(hit_log) for hit_log in hit_logs]
+    for reward, hit_log in zip(rewards, hit_logs):
+        expected = referenceRewards(hit_log, total_ships_lengths, config.board_size, gamma)
+        np.testing.assert_allclose(reward, expected, rtol=1e-9, atol=1e-9)
+
+def test_single_move_and_empty_batch():
+    config = getConfig('5x5')
+    assert discountedRewardsList([], 4, config.board_size) == []
+    rewards = discountedRewardsList([[1]], 1, config.board_size)
+    np.testing.assert_allclose(rewards[0], referenceRewards([1], 1, config.board_size))
@@ -1,24 +1,103 @@
-from Game import Game
+from Game import Game, BatchGame
 from GameConfig import *
-from DQNNetwork import DQNNetwork
+from DQNNetwork import DQNNetwork, ARCHITECTURES
+from ProbabilityDensity import ProbabilityDensity
+from SelfPlayActors import SelfPlayActors
+from ReplayBuffer import ReplayBuffer
+from Rewards import discountedRewardsList
+from Profiler import NULL_PROFILER, StageProfiler
+from Checkpointer import Checkpointer
+from Symmetry import augmentBatch
+from EpisodeLog import EpisodeRecorder
+import argparse
+import os
 import random
 import numpy as np
 import matplotlib.pyplot as plt
 
 class TrainGame:
-    def __init__(self, model_file=None):
+    def __init__(self, model_file=None, board_height=BOARD_HEIGHT, board_width=BOARD_WIDTH, ships=SHIPS, profiler=NULL_PROFILER, checkpoint_dir=None, keep_checkpoints=3, architecture='dense', allow_touching=True):
         self.gamma = 0.5
+        self.profiler = profiler
         self.alpha = 0.01
-        self.network = DQNNetwork(BOARD_WIDTH, BOARD_HEIGHT, len(SHIPS))
+        self.board_height = board_height
+        self.board_width = board_width
+        self.ships = ships
+        self.allow_touching = allow_touching
+        self.network = DQNNetwork(board_width, board_height, len(ships), profiler=profiler, architecture=architecture)
         if not model_file is None:
             self.network.restoreModel(r'C:\Users\baoph\Downloads\BattleShip\BattleShip\mymodel.keras')
-        self.game = Game(BOARD_WIDTH, BOARD_HEIGHT, SHIPS, network=self.network)
+        self.game = Game(board_height, board_width, ships, network=self.network, profiler=profiler, allow_touching=allow_touching)
+        self.num_parallel_games = 32
+        self.batch_game = BatchGame(self.num_parallel_games, board_height, board_width, ships, network=self.network, profiler=profiler, allow_touching=allow_touching)
+        self.pending_episodes = []
+        self.replay_buffer = None
+        self.replay_batch_size = 256
         self.total_ships_lengths = sum([ship['length'] for ship in self.game.board.ships])
         self.board_size = self.game.board.board_height * self.game.board.board_width
+        input_size = self.batch_game.input_dimensions.shape[1]
+        self.batch_step_states = np.zeros((self.num_parallel_games, input_size), dtype='float32')
+        self.batch_states = np.zeros((self.num_parallel_games, self.board_size, input_size), dtype='float32')
+        self.batch_moves = np.zeros((self.num_parallel_games, self.board_size), dtype='int64')
+        self.batch_hits = np.zeros((self.num_parallel_games, self.board_size), dtype='int64')
+        self.batch_lengths = np.zeros(self.num_parallel_games, dtype='int64')
         self.max_train_step = 3000
         self.episode_rewards = []
         self.episode_wins = []
         self.episode_moves = []
+        self.plot_results = True
+        self.augment_symmetries = False
+        self.start_step = 0
+        self.step = -1
+        self.last_checkpoint_step = None
+        self.num_eval_games = 200
+        self.checkpointer = None
+        self.recorder = None
+        self.record_dir = None
+        if checkpoint_dir is not None:
+            self.checkpointer = Checkpointer(checkpoint_dir, self.network, keep_checkpoints)
+
+    def resumeFromCheckpoint(self, path=None):
+        metadata = self.checkpointer.restore(path)
+        if metadata is not None:
+            self.start_step = metadata['step'] + 1
+            self.step = metadata['step']
+            self.last_checkpoint_step = metadata['step']
+        return metadata
+
+    def saveCheckpoint(self, step):
+        if self.checkpointer is None:
+            self.network.saveModel('./models/mymodel')
+            return
+        with self.profiler.stage('evaluate'):
+            score = self.evaluateGreedy()
+        with self.profiler.stage('checkpoint'):
+            self.checkpointer.save(step, score)
+        self.last_checkpoint_step = step
+        print(f"Checkpoint at step {step}, greedy score {score:.2f}")
+
+    def evaluateGreedy(self, seed=0):
+        """Điểm của mạng khi chơi tham lam (epsilon 0) trên cùng một tập bàn cờ có seed: âm của số nước trung bình để thắng"""
+        random_state = np.random.get_state()
+        epsilon = self.network.epsilon
+        np.random.seed(seed)
+        self.network.epsilon = 0.0
+        try:
+            batch_game = BatchGame(self.num_eval_games, self.board_height, self.board_width, self.ships, network=self.network, auto_reset=False, allow_touching=self.allow_touching)
+            while not batch_game.checkIfGameFinished().all():
+                batch_game.takeMoves()
+        finally:
+            self.network.epsilon = epsilon
+            np.random.set_state(random_state)
+        return -float(batch_game.move_counts.mean())
+
+    def startRecording(self, record_dir):
+        """Ghi mọi ván tự chơi của learner vào record_dir/learner.bin; mỗi actor ghi file riêng trong cùng thư mục"""
+        config = GameConfig(self.board_height, self.board_width, self.ships, self.allow_touching)
+        self.record_dir = record_dir
+        self.recorder = EpisodeRecorder(os.path.join(record_dir, 'learner.bin'), config)
+        self.game.recorder = self.recorder
+        self.batch_game.recorder = self.recorder
 
     def selfPlayOneGame(self):
         all_input_states = []
@@ -31,28 +110,57 @@ class TrainGame:
             all_moves.append(move)
             all_hits.append(is_hit)
             (input_dimensions, move, is_hit) = self.game.takeAMove()
+        self.game.recordEpisode()
         all_discounted_reward = self.rewardsCalculator(all_hits)
         return (all_input_states, all_moves, all_hits, all_discounted_reward)
 
+    def pretrainWithDensity(self, num_steps):
+        density = ProbabilityDensity(self.board_width, self.board_height, self.ships, allow_touching=self.allow_touching)
+        for step in range(num_steps):
+            (input_dimensions, moves, hits, finished) = self.batch_game.takeMoves()
+            target_probs = density.getSupervisedTargets(input_dimensions)
+            loss = self.network.trainTargetBatch(input_dimensions, target_probs)
+            if step % 100 == 0:
+                print(f"Pretrain step: {step}/{num_steps}, Loss: {loss:.4f}")
+        self.batch_game.resetBoards()
+        self.batch_lengths[:] = 0
+
+    def selfPlayBatch(self, num_episodes):
+        episodes = []
+        rows = np.arange(self.num_parallel_games)
+        while len(episodes) < num_episodes:
+            (input_dimensions, moves, hits, finished) = self.batch_game.takeMoves(out=self.batch_step_states)
+            self.batch_states[rows, self.batch_lengths] = input_dimensions
+            self.batch_moves[rows, self.batch_lengths] = moves
+            self.batch_hits[rows, self.batch_lengths] = hits
+            self.batch_lengths += 1
+            for index in np.flatnonzero(finished):
+                length = self.batch_lengths[index]
+                episodes.append((self.batch_states[index, :length].copy(), self.batch_moves[index, :length].tolist(), self.batch_hits[index, :length].tolist()))
+                self.batch_lengths[index] = 0
+        with self.profiler.stage('rewards'):
+            all_discounted_rewards = self.rewardsCalculatorBatch([all_hits for (_, _, all_hits) in episodes])
+        self.profiler.count('episodes', len(episodes))
+        return [episode + (rewards.tolist(),) for episode, rewards in zip(episodes, all_discounted_rewards)]
+
     def rewardsCalculator(self, hit_log, gamma=0.5):
-        hit_log_weighted = []
-        for index, item in enumerate(hit_log):
-            remaining_ships_length = self.total_ships_lengths - sum(hit_log[:index])
-            remaining_board_size = self.board_size - index
-            if remaining_board_size > 0:
-                weighted_item = (item - float(remaining_ships_length) / float(remaining_board_size)) * (gamma ** index)
-            else:
-                weighted_item = item  
-            hit_log_weighted.append(weighted_item)
-        return [((gamma) ** (-i)) * sum(hit_log_weighted[i:]) for i in range(len(hit_log))]
+        return self.rewardsCalculatorBatch([hit_log], gamma)[0].tolist()
+
+    def rewardsCalculatorBatch(self, hit_logs, gamma=0.5):
+        return discountedRewardsList(hit_logs, self.total_ships_lengths, self.board_size, gamma)
 
     def trainWithSelfPlay(self):
         batch_size = 50
         total_games = 0
         total_wins = 0
         total_moves = 0
-        for i in range(self.max_train_step):
-            (all_input_states, all_moves, all_hits, all_discounted_reward) = self.selfPlayOneGame()
+        self.profiler.reset()
+        for i in range(self.start_step, self.max_train_step):
+            self.profiler.episode(i)
+            if not self.pending_episodes:
+                with self.profiler.stage('self_play'):
+                    self.pending_episodes = self.selfPlayBatch(self.num_parallel_games)
+            (all_input_states, all_moves, all_hits, all_discounted_reward) = self.pending_episodes.pop(0)
             total_games += 1
             total_hits = sum(all_hits)
             total_moves += len(all_hits)
@@ -61,9 +169,17 @@ class TrainGame:
             self.episode_rewards.append(sum(all_discounted_reward))
             self.episode_wins.append(total_wins)
             self.episode_moves.append(total_moves)
-            for input_states, moves, discounted_reward in zip(all_input_states, all_moves, all_discounted_reward):
-                entropy = self.network.runTrainStep(input_states, [moves], self.alpha * discounted_reward)
+            if self.replay_buffer is None:
+                entropy = self.trainOnBatch(
+                    all_input_states,
+                    np.array(all_moves),
+                    self.alpha * np.array(all_discounted_reward)
+                )
+            else:
+                self.replay_buffer.addEpisode(all_input_states, all_moves, all_discounted_reward)
+                entropy = self.trainFromReplay()
             self.network.decay_epsilon()
+            self.step = i
             if i % batch_size == 0 and i != 0:
                 avg_moves = total_moves / batch_size
                 win_rate = total_wins / batch_size
@@ -72,14 +188,114 @@ class TrainGame:
                 print(f"Average Moves: {avg_moves}")
                 print(f"Win Rate: {win_rate:.4f}")
                 print(f"Total Reward: {sum(all_discounted_reward)}")
+                self.logProfile(i)
                 print("-" * 50)
                 total_wins = 0
                 total_moves = 0
                 total_games = 0
             if i % (batch_size * 20) == 0:
-                self.game.network.saveModel('./models/mymodel')
+                self.saveCheckpoint(i)
+                if self.replay_buffer is not None:
+                    self.replay_buffer.flush()
                 print(f"Model saved at step {i}")
-        self.plot_training_results()
+        self.finishTraining()
+
+    def logProfile(self, step):
+        report = self.profiler.log(step)
+        if report is None:
+            return
+        shares = sorted(report['stages'].items(), key=lambda item: -item[1]['share'])
+        print("Time Share: " + ", ".join(f"{name} {stage['share']:.1%}" for name, stage in shares))
+        print("Rates: " + ", ".join(f"{name} {rate:.1f}" for name, rate in report['rates'].items()))
+
+    def finishTraining(self):
+        if self.checkpointer is not None and self.step >= 0 and self.step != self.last_checkpoint_step:
+            self.saveCheckpoint(self.step)
+        self.profiler.close()
+        if self.replay_buffer is not None:
+            self.replay_buffer.flush()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.checkpointer is not None:
+            self.checkpointer.close()
+            self.network.saveModel('./models/mymodel')
+        if self.plot_results:
+            self.plot_training_results()
+
+    def trainFromReplay(self):
+        (states, actions, rewards, next_states, dones, indices, weights) = self.replay_buffer.sample(self.replay_batch_size)
+        return self.trainOnBatch(states, actions, self.alpha * rewards * weights)
+
+    def trainOnBatch(self, states, actions, advantages):
+        if self.augment_symmetries:
+            with self.profiler.stage('augment'):
+                (states, actions, advantages) = augmentBatch(states, actions, advantages, self.board_height, self.board_width)
+        return self.network.trainBatch(states, actions, advantages)
+
+    def trainWithActors(self, num_actors, sync_interval=10):
+        batch_size = 50
+        total_wins = 0
+        total_moves = 0
+        actors = SelfPlayActors(self.network, self.board_height, self.board_width, self.ships, num_actors, allow_touching=self.allow_touching, record_dir=self.record_dir)
+        actors.start()
+        self.profiler.reset()
+        try:
+            i = self.start_step
+            train_steps = 0
+            while i < self.max_train_step:
+                with self.profiler.stage('wait_for_actors'):
+                    episodes = actors.getEpisodes(min(self.num_parallel_games, self.max_train_step - i))
+                with self.profiler.stage('rewards'):
+                    all_discounted_rewards = self.rewardsCalculatorBatch([hits for (_, _, hits) in episodes])
+                self.profiler.count('episodes', len(episodes))
+                all_input_states = []
+                all_moves = []
+                all_rewards = []
+                for (input_states, moves, hits), all_discounted_reward in zip(episodes, all_discounted_rewards):
+                    all_input_states.append(input_states)
+                    all_moves.extend(moves)
+                    all_rewards.extend(all_discounted_reward)
+                    if self.replay_buffer is not None:
+                        self.replay_buffer.addEpisode(input_states, moves, all_discounted_reward)
+                    total_moves += len(hits)
+                    if sum(hits) > 0:
+                        total_wins += 1
+                    self.episode_rewards.append(sum(all_discounted_reward))
+                    self.episode_wins.append(total_wins)
+                    self.episode_moves.append(total_moves)
+                    self.network.decay_epsilon()
+                    self.profiler.episode(i)
+                    self.step = i
+                    if i % batch_size == 0 and i != 0:
+                        print(f"Episode: {i}/{self.max_train_step}")
+                        print(f"Epsilon: {self.network.epsilon:.4f}")
+                        print(f"Average Moves: {total_moves / batch_size}")
+                        print(f"Win Rate: {total_wins / batch_size:.4f}")
+                        print(f"Total Reward: {sum(all_discounted_reward)}")
+                        self.logProfile(i)
+                        print("-" * 50)
+                        total_wins = 0
+                        total_moves = 0
+                    if i % (batch_size * 20) == 0:
+                        self.saveCheckpoint(i)
+                        if self.replay_buffer is not None:
+                            self.replay_buffer.flush()
+                        print(f"Model saved at step {i}")
+                    i += 1
+                if self.replay_buffer is None:
+                    entropy = self.trainOnBatch(
+                        np.concatenate(all_input_states).astype('float32'),
+                        np.array(all_moves),
+                        self.alpha * np.array(all_rewards)
+                    )
+                else:
+                    entropy = self.trainFromReplay()
+                train_steps += 1
+                if train_steps % sync_interval == 0:
+                    actors.syncWeights()
+        finally:
+            actors.stop()
+        self.finishTraining()
 
     def plot_training_results(self):
         episodes = range(len(self.episode_rewards))
@@ -105,5 +321,54 @@ class TrainGame:
         plt.tight_layout()
         plt.show()
 
-train_game = TrainGame('./models/mymodel')
-train_game.trainWithSelfPlay()
\ No newline at end of file
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--config', default='5x5', choices=list(PRESETS), help='board size, fleet and placement rules to train on')
+    parser.add_argument('--architecture', default='dense', choices=ARCHITECTURES, help='convolutional models output per-cell logits and run on any board size')
+    parser.add_argument('--augment', action='store_true', help='train on every symmetric copy of each transition')
+    parser.add_argument('--replay', default=None, help='directory of a memory-mapped replay buffer to train from (created if missing)')
+    parser.add_argument('--replay-capacity', type=int, default=200000)
+    parser.add_argument('--prioritized', action='store_true', help='sample the replay buffer by priority instead of uniformly')
+    parser.add_argument('--profile-log', default=None, help='append per-stage timings and rates as JSON lines to this file')
+    parser.add_argument('--tensorboard', default=None, help='write per-stage timings and rates as TensorBoard scalars to this directory')
+    parser.add_argument('--cprofile', default=None, metavar='START:END', help='capture cProfile stats for episodes START to END')
+    parser.add_argument('--cprofile-output', default='train.prof')
+    parser.add_argument('--no-plot', action='store_true', help='skip the matplotlib window at the end of training')
+    parser.add_argument('--checkpoint-dir', default='./models/checkpoints', help='directory for background checkpoints')
+    parser.add_argument('--keep-checkpoints', type=int, default=3, help='number of recent checkpoints kept besides the best one')
+    parser.add_argument('--resume', nargs='?', const='latest', default=None, help='resume step, epsilon and optimizer state from the latest or a given checkpoint')
+    parser.add_argument('--overwrite-checkpoints', action='store_true', help='delete the checkpoints already in --checkpoint-dir and start a fresh run')
+    parser.add_argument('--record-episodes', default=None, metavar='DIR', help='append every self-play game to compressed episode logs in this directory')
+    parser.add_argument('--actors', type=int, default=0, help='number of self-play worker processes (0 plays in the learner process)')
+    parser.add_argument('--pretrain', type=int, default=0, metavar='STEPS', help='distil ProbabilityDensity targets into the network for STEPS batches before self-play')
+    args = parser.parse_args()
+    profiler = NULL_PROFILER
+    if args.profile_log or args.tensorboard or args.cprofile:
+        cprofile_window = tuple(int(value) for value in args.cprofile.split(':')) if args.cprofile else None
+        profiler = StageProfiler(args.profile_log, args.tensorboard, cprofile_window, args.cprofile_output)
+    config = getConfig(args.config)
+    train_game = TrainGame(
+        './models/mymodel', config.board_height, config.board_width, config.ships, profiler=profiler,
+        checkpoint_dir=args.checkpoint_dir, keep_checkpoints=args.keep_checkpoints,
+        architecture=args.architecture, allow_touching=config.allow_touching
+    )
+    if args.resume is not None:
+        train_game.resumeFromCheckpoint(None if args.resume == 'latest' else args.resume)
+    elif train_game.checkpointer is not None:
+        if args.overwrite_checkpoints:
+            train_game.checkpointer.reset()
+        elif train_game.checkpointer.latest() is not None or train_game.checkpointer.best() is not None:
+            train_game.checkpointer.close()
+            parser.error(f'{args.checkpoint_dir} already holds checkpoints, pass --resume to continue them or --overwrite-checkpoints to start over')
+    train_game.plot_results = not args.no_plot
+    train_game.augment_symmetries = args.augment
+    if args.replay is not None:
+        train_game.replay_buffer = ReplayBuffer(args.replay_capacity, config.board_size, config.num_ships, prioritized=args.prioritized, path=args.replay)
+    if args.pretrain > 0:
+        train_game.pretrainWithDensity(args.pretrain)
+    if args.record_episodes is not None:
+        train_game.startRecording(args.record_episodes)
+    if args.actors > 0:
+        train_game.trainWithActors(args.actors)
+    else:
+        train_game.trainWithSelfPlay()
\ No newline at end of file